@@ -1,20 +1,38 @@
 import argparse
 import asyncio
+import json
+import functools
 import logging
+import operator
 import os
 import signal
 import sys
 import time
-from decimal import Decimal
-from typing import Dict, Optional, Tuple
+from decimal import Context, Decimal
+from typing import Callable, Dict, Optional, Tuple
 
-import requests
+import aiohttp
+import orjson
+import websockets
 from lighter.signer_client import SignerClient
 
 from ostium_python_sdk import OstiumSDK
 from ostium_python_sdk.utils import get_trade_details, parse_limit_order_id
 
 
+# Seconds to wait for the L1 ticker stream before falling back to the full order book channel.
+LIGHTER_TICKER_FALLBACK_SECONDS = 5
+# Upper bound on waiting for queued Lighter hedges when the bot exits, including on an error.
+HEDGE_DRAIN_TIMEOUT = 60
+
+OSTIUM_NETWORK = "mainnet"
+# Shared with scripts/arbitrage_ostium_lighter.py; both honour OSTIUM_PAIRS_CACHE_HOURS (default 24).
+OSTIUM_PAIRS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ostium_pairs.json")
+
+# Base quantities only need ~20 significant digits; a local context keeps the global one untouched.
+_QTY_CONTEXT = Context(prec=20)
+
+
 class HedgeBot:
     """Hedge bot: Ostium LIMIT maker -> Lighter market taker."""
 
@@ -44,12 +62,39 @@ class HedgeBot:
         self.ostium_trader_address: Optional[str] = None
 
         self.lighter_client: Optional[SignerClient] = None
+        self.lighter_symbol: Optional[str] = None
         self.lighter_market_index: Optional[int] = None
         self.base_amount_multiplier: Optional[int] = None
         self.price_multiplier: Optional[int] = None
+        # Seeded from wall-clock ms once, then incremented, so ids stay unique across NTP jumps.
+        self._order_seq = int(time.time() * 1000)
 
         self.ostium_position = Decimal("0")
         self.lighter_position = Decimal("0")
+        self._trade_qty_cache: Dict[Tuple[str, str], Decimal] = {}
+
+        self._http: Optional[aiohttp.ClientSession] = None
+        self._lighter_book_index: Optional[Dict[str, Dict]] = None
+        self._lighter_book_ts = 0.0
+
+        # Lighter state pushed by the websocket; None means "not warm yet, fall back to REST".
+        self._ws_task: Optional[asyncio.Task] = None
+        self._ws_bids: Dict[Decimal, Decimal] = {}
+        self._ws_asks: Dict[Decimal, Decimal] = {}
+        self._ws_book_loaded = False
+        self._bbo: Optional[Tuple[Decimal, Decimal]] = None
+        self._bbo_int: Optional[Tuple[int, int]] = None
+        self._position: Optional[Decimal] = None
+        # The event and hedge queue are created in trading_loop(): before Python 3.10 asyncio
+        # primitives bind to the loop current at construction, and __main__ builds the bot
+        # before asyncio.run() starts its own loop.
+        self._position_changed_event: Optional[asyncio.Event] = None
+
+        # Lighter hedges run on a background worker so the next Ostium order needn't wait for them.
+        self._hedge_queue: Optional[asyncio.Queue] = None
+        self._hedge_task: Optional[asyncio.Task] = None
+        self._pending_hedge_qty = Decimal("0")
+        self._hedge_error: Optional[Exception] = None
 
         self.lighter_base_url = os.getenv(
             "LIGHTER_BASE_URL", "https://mainnet.zklighter.elliot.ai"
@@ -61,6 +106,10 @@ class HedgeBot:
         self.ostium_price_offset_bps = Decimal(
             os.getenv("OSTIUM_PRICE_OFFSET_BPS", "5")
         )
+        # Limit price multipliers are fixed for the run; precompute them once.
+        offset = self.ostium_price_offset_bps / Decimal("10000")
+        self._buy_price_factor = Decimal("1") - offset
+        self._sell_price_factor = Decimal("1") + offset
 
         self.logger = self._setup_logger()
 
@@ -90,7 +139,9 @@ class HedgeBot:
         self.stop_flag = True
         self.logger.info("Stopping hedge bot...")
 
-    def _parse_ticker(self) -> Tuple[str, str, str]:
+    @functools.cached_property
+    def _parsed_ticker(self) -> Tuple[str, str, str]:
+        # (base, quote, lighter_symbol); the ticker is fixed for the bot's lifetime.
         if "-" in self.ticker:
             base, quote = self.ticker.split("-", 1)
             lighter_symbol = f"{base}{quote}"
@@ -105,23 +156,47 @@ class HedgeBot:
         lighter_symbol = self.ticker
         return base, quote, lighter_symbol
 
+    def _load_pairs_cache(self) -> Optional[Dict[str, int]]:
+        # Pair ids are effectively immutable, so a recent map avoids a subgraph query per restart.
+        ttl = float(os.getenv("OSTIUM_PAIRS_CACHE_HOURS", "24")) * 3600
+        try:
+            if time.time() - os.path.getmtime(OSTIUM_PAIRS_CACHE_PATH) > ttl:
+                return None
+            with open(OSTIUM_PAIRS_CACHE_PATH, "r", encoding="utf-8") as f:
+                return json.load(f).get(OSTIUM_NETWORK)
+        except (OSError, ValueError, AttributeError):
+            return None
+
+    def _save_pairs_cache(self, pairs_map: Dict[str, int]) -> None:
+        try:
+            os.makedirs(os.path.dirname(OSTIUM_PAIRS_CACHE_PATH), exist_ok=True)
+            with open(OSTIUM_PAIRS_CACHE_PATH, "w", encoding="utf-8") as f:
+                json.dump({OSTIUM_NETWORK: pairs_map}, f)
+        except OSError as exc:
+            self.logger.warning(f"Failed to write Ostium pairs cache: {exc}")
+
     async def initialize_ostium(self) -> None:
         private_key = os.getenv("PRIVATE_KEY")
         rpc_url = os.getenv("RPC_URL")
         if not private_key or not rpc_url:
             raise ValueError("PRIVATE_KEY and RPC_URL must be set for Ostium")
 
-        self.ostium_sdk = OstiumSDK("mainnet", private_key=private_key, rpc_url=rpc_url)
+        self.ostium_sdk = OstiumSDK(OSTIUM_NETWORK, private_key=private_key, rpc_url=rpc_url)
         self.ostium_trader_address = self.ostium_sdk.ostium.get_public_address()
 
-        base, quote, _ = self._parse_ticker()
-        pairs = await self.ostium_sdk.subgraph.get_pairs()
-        pair_id = None
-        for pair in pairs:
-            if pair.get("from") == base and pair.get("to") == quote:
-                pair_id = int(pair.get("id"))
-                break
-
+        base, quote, _ = self._parsed_ticker
+        key = f"{base}-{quote}"
+        pairs_map = self._load_pairs_cache()
+        if pairs_map is None or key not in pairs_map:
+            pairs = await self.ostium_sdk.subgraph.get_pairs()
+            pairs_map = {
+                f"{pair.get('from')}-{pair.get('to')}": int(pair.get("id"))
+                for pair in pairs
+                if pair.get("from") and pair.get("to") and pair.get("id") is not None
+            }
+            self._save_pairs_cache(pairs_map)
+
+        pair_id = pairs_map.get(key)
         if pair_id is None:
             raise ValueError(f"Ostium pair not found for {base}-{quote}")
 
@@ -158,20 +233,43 @@ class HedgeBot:
             return Decimal(str(first["price"]))
         return None
 
-    def _fetch_lighter_order_book(self, symbol: str) -> Optional[Dict]:
-        url = f"{self.lighter_base_url}/api/v1/orderBooks"
-        resp = requests.get(url, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
-
+    async def _ensure_http(self) -> aiohttp.ClientSession:
+        # One keep-alive pool for all Lighter REST calls instead of a new TCP/TLS handshake per poll.
+        if self._http is None or self._http.closed:
+            self._http = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=16, keepalive_timeout=60),
+                timeout=aiohttp.ClientTimeout(total=10),
+            )
+        return self._http
+
+    async def _close_http(self) -> None:
+        if self._http is not None and not self._http.closed:
+            await self._http.close()
+        self._http = None
+
+    async def _lighter_get(self, path: str, params: Optional[Dict[str, str]] = None) -> Dict:
+        session = await self._ensure_http()
+        async with session.get(f"{self.lighter_base_url}{path}", params=params) as resp:
+            resp.raise_for_status()
+            return orjson.loads(await resp.read())
+
+    async def _get_orderbook_cache(self, ttl: float = 0.25) -> Dict[str, Dict]:
+        # orderBooks payload indexed by symbol; only refetched once it is older than ttl seconds.
+        now = time.monotonic()
+        if self._lighter_book_index is not None and now - self._lighter_book_ts < ttl:
+            return self._lighter_book_index
+
+        data = await self._lighter_get("/api/v1/orderBooks")
         order_books = data.get("order_books") or data.get("orderBooks") or []
-        for item in order_books:
-            if item.get("symbol") == symbol:
-                return item
-        return None
+        self._lighter_book_index = {
+            item.get("symbol"): item for item in order_books if item.get("symbol")
+        }
+        self._lighter_book_ts = now
+        return self._lighter_book_index
 
-    def get_lighter_market_config(self, symbol: str) -> Tuple[int, int, int]:
-        data = self._fetch_lighter_order_book(symbol)
+    async def get_lighter_market_config(self, symbol: str) -> Tuple[int, int, int]:
+        # Market metadata does not change while the bot runs; any cached payload will do.
+        data = (await self._get_orderbook_cache(ttl=float("inf"))).get(symbol)
         if not data:
             raise ValueError(f"Lighter symbol not found: {symbol}")
 
@@ -180,8 +278,11 @@ class HedgeBot:
         price_mult = 10 ** int(data["supported_price_decimals"])
         return market_id, base_mult, price_mult
 
-    def get_lighter_bbo(self, symbol: str) -> Tuple[Decimal, Decimal]:
-        data = self._fetch_lighter_order_book(symbol)
+    async def get_lighter_bbo(self, symbol: str) -> Tuple[Decimal, Decimal]:
+        if symbol == self.lighter_symbol and self._bbo is not None:
+            return self._bbo
+
+        data = (await self._get_orderbook_cache(ttl=0.25)).get(symbol)
         if not data:
             raise ValueError(f"Lighter symbol not found: {symbol}")
 
@@ -191,6 +292,156 @@ class HedgeBot:
             raise ValueError("Lighter order book missing bids/asks")
         return best_bid, best_ask
 
+    def _lighter_ws_url(self) -> str:
+        base_url = self.lighter_base_url.rstrip("/")
+        if base_url.startswith("https://"):
+            return "wss://" + base_url[len("https://"):] + "/stream"
+        if base_url.startswith("http://"):
+            return "ws://" + base_url[len("http://"):] + "/stream"
+        return base_url + "/stream"
+
+    def _reset_lighter_ws_state(self) -> None:
+        self._ws_bids.clear()
+        self._ws_asks.clear()
+        self._ws_book_loaded = False
+        self._bbo = None
+        self._bbo_int = None
+        self._position = None
+
+    @staticmethod
+    def _apply_book_levels(book: Dict[Decimal, Decimal], levels) -> None:
+        for level in levels or []:
+            if isinstance(level, (list, tuple)) and len(level) >= 2:
+                price, size = Decimal(str(level[0])), Decimal(str(level[1]))
+            elif isinstance(level, dict):
+                price, size = Decimal(str(level.get("price", 0))), Decimal(str(level.get("size", 0)))
+            else:
+                continue
+            if size > 0:
+                book[price] = size
+            else:
+                book.pop(price, None)
+
+    def _handle_lighter_book(self, order_book: Dict, snapshot: bool) -> None:
+        if snapshot:
+            self._ws_bids.clear()
+            self._ws_asks.clear()
+            self._ws_book_loaded = True
+        elif not self._ws_book_loaded:
+            return
+
+        self._apply_book_levels(self._ws_bids, order_book.get("bids"))
+        self._apply_book_levels(self._ws_asks, order_book.get("asks"))
+        if self._ws_bids and self._ws_asks:
+            self._set_bbo(max(self._ws_bids), min(self._ws_asks))
+        else:
+            self._bbo = None
+            self._bbo_int = None
+
+    def _handle_lighter_ticker(self, ticker: Dict) -> None:
+        best_bid = (ticker.get("b") or {}).get("price")
+        best_ask = (ticker.get("a") or {}).get("price")
+        if best_bid is None or best_ask is None:
+            return
+        self._set_bbo(Decimal(str(best_bid)), Decimal(str(best_ask)))
+
+    def _set_bbo(self, best_bid: Decimal, best_ask: Decimal) -> None:
+        self._bbo = (best_bid, best_ask)
+        self._bbo_int = (
+            int(best_bid * self.price_multiplier),
+            int(best_ask * self.price_multiplier),
+        )
+
+    def _handle_lighter_account(self, data: Dict, snapshot: bool) -> None:
+        positions = data.get("positions") or {}
+        entries = positions.values() if isinstance(positions, dict) else positions
+
+        # A snapshot without our market means flat; an update without it means unchanged.
+        position = Decimal("0") if snapshot else None
+        for entry in entries:
+            if (
+                entry.get("symbol") == self.lighter_symbol
+                or str(entry.get("market_id")) == str(self.lighter_market_index)
+            ):
+                position = Decimal(str(entry.get("position", "0"))) * int(entry.get("sign", 1))
+                break
+
+        if position is not None and position != self._position:
+            self._position = position
+            self._position_changed_event.set()
+
+    async def _start_lighter_ws(self) -> None:
+        url = self._lighter_ws_url()
+        while not self.stop_flag:
+            try:
+                async with websockets.connect(url) as ws:
+                    # Top-of-book only needs the L1 ticker; the full book is a fallback.
+                    await ws.send(json.dumps(
+                        {"type": "subscribe", "channel": f"ticker/{self.lighter_market_index}"}
+                    ))
+                    await ws.send(json.dumps(
+                        {"type": "subscribe", "channel": f"account_all/{self.account_index}"}
+                    ))
+                    self.logger.info("Lighter websocket subscribed to ticker and account")
+                    connected_at = time.monotonic()
+                    ticker_seen = False
+                    book_subscribed = False
+
+                    while not self.stop_flag:
+                        if (
+                            not ticker_seen
+                            and not book_subscribed
+                            and time.monotonic() - connected_at > LIGHTER_TICKER_FALLBACK_SECONDS
+                        ):
+                            self.logger.warning("No Lighter ticker updates, falling back to order book channel")
+                            await ws.send(json.dumps(
+                                {"type": "subscribe", "channel": f"order_book/{self.lighter_market_index}"}
+                            ))
+                            book_subscribed = True
+
+                        try:
+                            msg = await asyncio.wait_for(ws.recv(), timeout=1)
+                        except asyncio.TimeoutError:
+                            continue
+
+                        data = orjson.loads(msg)
+                        msg_type = data.get("type")
+                        if msg_type == "ping":
+                            await ws.send(json.dumps({"type": "pong"}))
+                        elif msg_type in ("subscribed/ticker", "update/ticker"):
+                            ticker_seen = True
+                            self._handle_lighter_ticker(data.get("ticker", {}))
+                        elif msg_type in ("subscribed/order_book", "update/order_book"):
+                            self._handle_lighter_book(
+                                data.get("order_book", {}), snapshot=msg_type == "subscribed/order_book"
+                            )
+                        elif msg_type in ("subscribed/account_all", "update/account_all"):
+                            self._handle_lighter_account(data, snapshot=msg_type == "subscribed/account_all")
+            except Exception as exc:
+                self.logger.warning(f"Lighter websocket error: {exc}")
+            finally:
+                self._reset_lighter_ws_state()
+
+            if not self.stop_flag:
+                await asyncio.sleep(2)
+
+    async def _stop_lighter_ws(self) -> None:
+        if self._ws_task is None:
+            return
+        self._ws_task.cancel()
+        try:
+            await self._ws_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._ws_task = None
+
+    async def _get_lighter_bbo_int(self) -> Tuple[int, int]:
+        # Best bid/ask already scaled by price_multiplier, as the Lighter signer expects.
+        if self._bbo_int is not None:
+            return self._bbo_int
+        best_bid, best_ask = await self.get_lighter_bbo(self.lighter_symbol)
+        return int(best_bid * self.price_multiplier), int(best_ask * self.price_multiplier)
+
     async def get_ostium_price(self) -> Tuple[Decimal, Decimal, Decimal]:
         if not self.ostium_sdk or not self.ostium_from or not self.ostium_to:
             raise ValueError("Ostium not initialized")
@@ -203,18 +454,22 @@ class HedgeBot:
         return bid, ask, mid
 
     def _calc_limit_price(self, side: str, bid: Decimal, ask: Decimal, mid: Decimal) -> Decimal:
-        offset = self.ostium_price_offset_bps / Decimal("10000")
         if side == "buy":
             base = bid if bid > 0 else mid
-            return base * (Decimal("1") - offset)
+            return base * self._buy_price_factor
         base = ask if ask > 0 else mid
-        return base * (Decimal("1") + offset)
+        return base * self._sell_price_factor
 
-    async def place_ostium_limit_order(self, side: str, quantity: Decimal) -> Optional[Dict]:
+    async def place_ostium_limit_order(
+        self,
+        side: str,
+        quantity: Decimal,
+        prices: Optional[Tuple[Decimal, Decimal, Decimal]] = None,
+    ) -> Optional[Dict]:
         if not self.ostium_sdk or self.ostium_pair_id is None:
             raise ValueError("Ostium not initialized")
 
-        bid, ask, mid = await self.get_ostium_price()
+        bid, ask, mid = prices if prices is not None else await self.get_ostium_price()
         order_price = self._calc_limit_price(side, bid, ask, mid)
         notional = order_price * quantity
         collateral = notional / self.ostium_leverage
@@ -269,21 +524,24 @@ class HedgeBot:
         if not self.lighter_client or self.lighter_market_index is None:
             raise ValueError("Lighter not initialized")
 
-        best_bid, best_ask = self.get_lighter_bbo(self.lighter_symbol)
+        best_bid_int, best_ask_int = await self._get_lighter_bbo_int()
 
         if side == "buy":
             is_ask = False
-            price = best_ask * Decimal("1.002")
+            price_int = best_ask_int * 1002 // 1000
         else:
             is_ask = True
-            price = best_bid * Decimal("0.998")
+            price_int = best_bid_int * 998 // 1000
 
-        client_order_index = int(time.time() * 1000)
+        # Read the baseline before sending so a fast websocket push can't be mistaken for it.
+        initial_position = await self.get_lighter_position()
+        self._order_seq += 1
+        client_order_index = self._order_seq
         tx, tx_hash, error = await self.lighter_client.create_order(
             market_index=self.lighter_market_index,
             client_order_index=client_order_index,
             base_amount=int(quantity * self.base_amount_multiplier),
-            price=int(price * self.price_multiplier),
+            price=price_int,
             is_ask=is_ask,
             order_type=self.lighter_client.ORDER_TYPE_LIMIT,
             time_in_force=self.lighter_client.ORDER_TIME_IN_FORCE_GOOD_TILL_TIME,
@@ -293,16 +551,17 @@ class HedgeBot:
         if error is not None:
             raise ValueError(f"Lighter order error: {error}")
 
+        price = Decimal(price_int) / self.price_multiplier
         self.logger.info(f"Lighter MARKET {side} qty={quantity} price={price} tx={tx_hash}")
 
-        await self._wait_for_lighter_position_change(side, quantity)
+        await self._wait_for_lighter_position_change(side, quantity, initial_position)
+
+    async def get_lighter_position(self) -> Decimal:
+        if self._position is not None:
+            return self._position
 
-    def get_lighter_position(self) -> Decimal:
-        url = f"{self.lighter_base_url}/api/v1/account"
-        params = {"by": "index", "value": self.account_index}
-        resp = requests.get(url, params=params, timeout=10)
-        resp.raise_for_status()
-        data = resp.json()
+        params = {"by": "index", "value": str(self.account_index)}
+        data = await self._lighter_get("/api/v1/account", params=params)
 
         positions = data.get("accounts", [{}])[0].get("positions", [])
         for position in positions:
@@ -310,16 +569,24 @@ class HedgeBot:
                 return Decimal(position["position"]) * position["sign"]
         return Decimal("0")
 
-    async def _wait_for_lighter_position_change(self, side: str, quantity: Decimal) -> None:
+    async def _wait_for_lighter_position_change(
+        self, side: str, quantity: Decimal, initial: Decimal
+    ) -> None:
         start = time.time()
-        initial = self.get_lighter_position()
         target_delta = quantity if side == "buy" else -quantity
+        delay = 0.05
 
         while time.time() - start < 30 and not self.stop_flag:
-            current = self.get_lighter_position()
+            self._position_changed_event.clear()
+            current = await self.get_lighter_position()
             if (current - initial) * target_delta > 0:
                 return
-            await asyncio.sleep(0.2)
+            # Woken by the websocket on a position push; the backing-off timeout drives REST polling.
+            try:
+                await asyncio.wait_for(self._position_changed_event.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 1.5, 0.5)
 
         self.logger.warning("Lighter position did not update within timeout")
 
@@ -331,33 +598,151 @@ class HedgeBot:
             self.ostium_trader_address
         )
         total = Decimal("0")
+        seen = set()
         for trade in open_trades or []:
             if int(trade["pair"]["id"]) != int(self.ostium_pair_id):
                 continue
-            open_price, trade_notional, _, _, _, _, _, is_long, _, _ = get_trade_details(
-                trade
-            )
-            if not open_price or not trade_notional:
-                continue
-            base_qty = Decimal(str(trade_notional)) / Decimal(str(open_price))
-            total += base_qty if is_long else -base_qty
+
+            # Keyed on notional too so a partially closed trade is recomputed.
+            key = (str(trade.get("id")), str(trade.get("tradeNotional")))
+            seen.add(key)
+            signed_qty = self._trade_qty_cache.get(key)
+            if signed_qty is None:
+                open_price, trade_notional, _, _, _, _, _, is_long, _, _ = get_trade_details(
+                    trade
+                )
+                if not open_price or not trade_notional:
+                    continue
+                base_qty = _QTY_CONTEXT.divide(
+                    Decimal(str(trade_notional)), Decimal(str(open_price))
+                )
+                signed_qty = base_qty if is_long else -base_qty
+                self._trade_qty_cache[key] = signed_qty
+            total += signed_qty
+
+        for key in self._trade_qty_cache.keys() - seen:
+            del self._trade_qty_cache[key]
         return total
 
+    async def refresh_positions(self) -> None:
+        ostium_pos, lighter_pos = await asyncio.gather(
+            self.get_ostium_position(), self.get_lighter_position(), return_exceptions=True
+        )
+        # Retry a failed leg on its own so an error on one side doesn't mask the other.
+        if isinstance(ostium_pos, Exception):
+            self.logger.warning(f"Concurrent Ostium position fetch failed, retrying: {ostium_pos}")
+            ostium_pos = await self.get_ostium_position()
+        if isinstance(lighter_pos, Exception):
+            self.logger.warning(f"Concurrent Lighter position fetch failed, retrying: {lighter_pos}")
+            lighter_pos = await self.get_lighter_position()
+        self.ostium_position, self.lighter_position = ostium_pos, lighter_pos
+
+    async def _snapshot(self) -> Tuple[Decimal, Decimal, Decimal]:
+        # Positions and the next order's Ostium prices in one round of concurrent requests.
+        prices, _ = await asyncio.gather(self.get_ostium_price(), self.refresh_positions())
+        return prices
+
+    async def _hedge_worker(self) -> None:
+        # Single consumer, so hedges execute strictly in the order their Ostium fills arrived.
+        while True:
+            side, quantity = await self._hedge_queue.get()
+            try:
+                await self.place_lighter_market_order(side, quantity)
+            except Exception as exc:
+                self.logger.error(f"Lighter hedge {side} {quantity} failed: {exc}")
+                self._hedge_error = exc
+                self.stop_flag = True
+            finally:
+                self._pending_hedge_qty -= quantity if side == "buy" else -quantity
+                self._hedge_queue.task_done()
+
+    def _queue_hedge(self, side: str, quantity: Decimal) -> None:
+        self._pending_hedge_qty += quantity if side == "buy" else -quantity
+        self._hedge_queue.put_nowait((side, quantity))
+
+    async def _drain_hedges(self) -> None:
+        await self._hedge_queue.join()
+        if self._hedge_error is not None:
+            raise self._hedge_error
+
+    async def _flush_hedges(self) -> None:
+        # Every queued hedge backs an Ostium fill; let the worker finish them before it is cancelled.
+        if self._hedge_queue is None or self._hedge_task is None or self._hedge_task.done():
+            return
+        try:
+            await asyncio.wait_for(self._hedge_queue.join(), timeout=HEDGE_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            self.logger.error(
+                f"Lighter hedges still pending after {HEDGE_DRAIN_TIMEOUT}s, "
+                f"unhedged qty={self._pending_hedge_qty}"
+            )
+
+    async def _stop_hedge_worker(self) -> None:
+        if self._hedge_task is None:
+            return
+        self._hedge_task.cancel()
+        try:
+            await self._hedge_task
+        except (asyncio.CancelledError, Exception):
+            pass
+        self._hedge_task = None
+
+    async def _half_cycle(
+        self,
+        ostium_side: str,
+        lighter_side: str,
+        within_limit: Callable[[Decimal, Decimal], bool],
+        limit: Decimal,
+        prices: Optional[Tuple[Decimal, Decimal, Decimal]],
+    ) -> Optional[Tuple[Decimal, Decimal, Decimal]]:
+        while within_limit(self.ostium_position, limit) and not self.stop_flag:
+            trade = await self.place_ostium_limit_order(ostium_side, self.order_quantity, prices)
+            if trade:
+                base_qty = self.order_quantity
+                if trade.get("tradeNotional") and trade.get("openPrice"):
+                    base_qty = Decimal(str(trade["tradeNotional"])) / Decimal(
+                        str(trade["openPrice"])
+                    )
+                self._queue_hedge(lighter_side, abs(base_qty))
+
+            prices = await self._snapshot()
+
+            # Hedges still queued or in flight count as done so they aren't mistaken for drift.
+            lighter_expected = self.lighter_position + self._pending_hedge_qty
+            if abs(self.ostium_position + lighter_expected) > self.order_quantity * 2:
+                self.logger.error("Position diff too large, stopping")
+                self.stop_flag = True
+                break
+
+        # The drain can wait on Lighter for a while; don't hand the next half a pre-drain quote.
+        drained = self._pending_hedge_qty != 0
+        await self._drain_hedges()
+        return None if drained else prices
+
     async def trading_loop(self) -> None:
         self.setup_signal_handlers()
+        self._position_changed_event = asyncio.Event()
+        self._hedge_queue = asyncio.Queue()
 
         await self.initialize_ostium()
         self.initialize_lighter()
+        await self._ensure_http()
 
-        base, quote, lighter_symbol = self._parse_ticker()
+        base, quote, lighter_symbol = self._parsed_ticker
         self.lighter_symbol = lighter_symbol
         self.lighter_market_index, self.base_amount_multiplier, self.price_multiplier = (
-            self.get_lighter_market_config(lighter_symbol)
+            await self.get_lighter_market_config(lighter_symbol)
         )
 
         self.logger.info(
             f"Lighter symbol resolved: {lighter_symbol} (market_id={self.lighter_market_index})"
         )
+        self._ws_task = asyncio.create_task(self._start_lighter_ws())
+        self._hedge_task = asyncio.create_task(self._hedge_worker())
+
+        # Each half-cycle is bound once here so the loop below carries no per-side branching.
+        buy_half = functools.partial(self._half_cycle, "buy", "sell", operator.lt, self.max_position)
+        sell_half = functools.partial(self._half_cycle, "sell", "buy", operator.gt, -self.max_position)
 
         for iteration in range(self.iterations):
             if self.stop_flag:
@@ -365,50 +750,18 @@ class HedgeBot:
 
             self.logger.info(f"Iteration {iteration + 1}/{self.iterations}")
 
-            self.ostium_position = await self.get_ostium_position()
-            self.lighter_position = self.get_lighter_position()
-
-            while self.ostium_position < self.max_position and not self.stop_flag:
-                trade = await self.place_ostium_limit_order("buy", self.order_quantity)
-                if trade:
-                    base_qty = self.order_quantity
-                    if trade.get("tradeNotional") and trade.get("openPrice"):
-                        base_qty = Decimal(str(trade["tradeNotional"])) / Decimal(
-                            str(trade["openPrice"])
-                        )
-                    await self.place_lighter_market_order("sell", abs(base_qty))
-
-                self.ostium_position = await self.get_ostium_position()
-                self.lighter_position = self.get_lighter_position()
-
-                if abs(self.ostium_position + self.lighter_position) > self.order_quantity * 2:
-                    self.logger.error("Position diff too large, stopping")
-                    self.stop_flag = True
-                    break
+            prices = await self._snapshot()
+            prices = await buy_half(prices)
 
             if self.stop_flag:
                 break
 
             if self.sleep_time > 0:
                 await asyncio.sleep(self.sleep_time)
+                # Snapshot prices are stale after the pause; let the order fetch its own.
+                prices = None
 
-            while self.ostium_position > -self.max_position and not self.stop_flag:
-                trade = await self.place_ostium_limit_order("sell", self.order_quantity)
-                if trade:
-                    base_qty = self.order_quantity
-                    if trade.get("tradeNotional") and trade.get("openPrice"):
-                        base_qty = Decimal(str(trade["tradeNotional"])) / Decimal(
-                            str(trade["openPrice"])
-                        )
-                    await self.place_lighter_market_order("buy", abs(base_qty))
-
-                self.ostium_position = await self.get_ostium_position()
-                self.lighter_position = self.get_lighter_position()
-
-                if abs(self.ostium_position + self.lighter_position) > self.order_quantity * 2:
-                    self.logger.error("Position diff too large, stopping")
-                    self.stop_flag = True
-                    break
+            await sell_half(prices)
 
             if self.sleep_time > 0:
                 await asyncio.sleep(self.sleep_time)
@@ -419,6 +772,11 @@ class HedgeBot:
         except Exception as exc:
             self.logger.error(f"Error: {exc}")
             raise
+        finally:
+            await self._flush_hedges()
+            await self._stop_hedge_worker()
+            await self._stop_lighter_ws()
+            await self._close_http()
 
 
 if __name__ == "__main__":
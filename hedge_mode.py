@@ -25,6 +25,7 @@ Cross-platform compatibility:
 """
 
 import asyncio
+import importlib
 import sys
 import argparse
 from decimal import Decimal
@@ -80,38 +81,28 @@ def validate_exchange(exchange):
         sys.exit(1)
 
 
+# exchange key -> (module, class); "_v2" suffix selects the --v2 implementation
+_LOADERS = {
+    'backpack': ('hedge.hedge_mode_bp', 'HedgeBot'),
+    'extended': ('hedge.hedge_mode_ext', 'HedgeBot'),
+    'apex': ('hedge.hedge_mode_apex', 'HedgeBot'),
+    'grvt': ('hedge.hedge_mode_grvt', 'HedgeBot'),
+    'grvt_v2': ('hedge.hedge_mode_grvt_v2', 'HedgeBot'),
+    'edgex': ('hedge.hedge_mode_edgex', 'HedgeBot'),
+    'nado': ('hedge.hedge_mode_nado', 'HedgeBot'),
+    'standx': ('hedge.hedge_mode_standx', 'HedgeBot'),
+    'ostium': ('hedge.hedge_mode_ostium', 'HedgeBot'),
+}
+
+
 def get_hedge_bot_class(exchange, v2=False):
     """Import and return the appropriate HedgeBot class."""
+    key = exchange.lower() + ('_v2' if v2 else '')
+    if key not in _LOADERS:
+        raise ValueError(f"Unsupported exchange: {exchange}")
+    module_name, class_name = _LOADERS[key]
     try:
-        if exchange.lower() == 'backpack':
-            from hedge.hedge_mode_bp import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'extended':
-            from hedge.hedge_mode_ext import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'apex':
-            from hedge.hedge_mode_apex import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'grvt':
-            if v2:
-                from hedge.hedge_mode_grvt_v2 import HedgeBot
-            else:
-                from hedge.hedge_mode_grvt import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'edgex':
-            from hedge.hedge_mode_edgex import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'nado':
-            from hedge.hedge_mode_nado import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'standx':
-            from hedge.hedge_mode_standx import HedgeBot
-            return HedgeBot
-        elif exchange.lower() == 'ostium':
-            from hedge.hedge_mode_ostium import HedgeBot
-            return HedgeBot
-        else:
-            raise ValueError(f"Unsupported exchange: {exchange}")
+        return getattr(importlib.import_module(module_name), class_name)
     except ImportError as e:
         print(f"Error importing hedge mode implementation: {e}")
         sys.exit(1)
@@ -190,4 +181,10 @@ async def main():
 
 
 if __name__ == "__main__":
+    # uvloop is optional; fall back to the default asyncio loop when it isn't installed.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     sys.exit(asyncio.run(main()))
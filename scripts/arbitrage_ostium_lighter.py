@@ -3,12 +3,14 @@ import asyncio
 import json
 import os
 import logging
+import ssl
 import time
 from dataclasses import dataclass
-from decimal import Decimal
 from typing import Dict, Optional, Tuple
 
-import requests
+import aiohttp
+import certifi
+import orjson
 import websockets
 import dotenv
 
@@ -17,16 +19,20 @@ from ostium_python_sdk.utils import parse_limit_order_id
 from lighter.signer_client import SignerClient
 
 
+# Market prices and bps only need float precision; exact scaling happens at the Lighter signer.
+PX = float
+
+
 @dataclass
 class ExecResult:
     symbol: str
     direction: str
-    ostium_price: Decimal
-    lighter_price: Decimal
-    gross_bps: Decimal
-    cost_bps: Decimal
-    funding_bps: Decimal
-    net_bps: Decimal
+    ostium_price: PX
+    lighter_price: PX
+    gross_bps: PX
+    cost_bps: PX
+    funding_bps: PX
+    net_bps: PX
 
 
 CRYPTO_SYMBOLS = {"BTC", "ETH", "SOL", "BNB", "ADA", "TRX", "XRP", "LINK", "HYPE"}
@@ -48,14 +54,19 @@ STOCK_SYMBOLS = {
 }
 
 
-def _ostium_fee_bps_by_symbol(symbol: str, is_maker: bool) -> Decimal:
-    if symbol in CRYPTO_SYMBOLS:
-        return Decimal("3") if is_maker else Decimal("10")
-    if symbol in METAL_SYMBOLS:
-        return Decimal("3") if symbol == "XAU" else Decimal("15")
-    if symbol in FOREX_SYMBOLS:
-        return Decimal("3")
-    return Decimal("5")
+# symbol -> (maker_bps, taker_bps); anything unlisted pays _DEFAULT_FEE_BPS.
+_DEFAULT_FEE_BPS: Tuple[PX, PX] = (5.0, 5.0)
+_FEE_TABLE: Dict[str, Tuple[PX, PX]] = {
+    **{s: (3.0, 10.0) for s in CRYPTO_SYMBOLS},
+    "XAU": (3.0, 3.0),
+    "XAG": (15.0, 15.0),
+    **{s: (3.0, 3.0) for s in FOREX_SYMBOLS},
+    **{s: _DEFAULT_FEE_BPS for s in STOCK_SYMBOLS},
+}
+
+
+def _ostium_fee_bps_by_symbol(symbol: str, is_maker: bool) -> PX:
+    return _FEE_TABLE.get(symbol, _DEFAULT_FEE_BPS)[0 if is_maker else 1]
 
 
 def _derive_ws_url(base_url: str) -> str:
@@ -66,68 +77,90 @@ def _derive_ws_url(base_url: str) -> str:
     return base_url.rstrip("/") + "/stream"
 
 
-def _fetch_lighter_markets(base_url: str, timeout: int) -> Dict[str, Dict]:
+# Built once: constructing an SSLContext (and loading the CA bundle) per request is pure latency.
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+# Shared keep-alive session for Lighter REST calls; created lazily inside the running loop.
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60, ssl=_SSL_CTX)
+        )
+    return _SESSION
+
+
+async def _close_session() -> None:
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+async def _fetch_lighter_markets(base_url: str, timeout: int) -> Dict[str, Dict]:
     url = f"{base_url.rstrip('/')}/api/v1/orderBooks"
-    resp = requests.get(url, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
+    async with _get_session().get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        resp.raise_for_status()
+        data = await resp.json(loads=orjson.loads)
     order_books = data.get("order_books") or data.get("orderBooks") or []
     return {ob.get("symbol"): ob for ob in order_books if ob.get("symbol")}
 
 
-def _parse_levels(levels: list):
-    parsed = []
-    for level in levels or []:
-        if isinstance(level, (list, tuple)) and len(level) >= 2:
-            price = Decimal(str(level[0]))
-            size = Decimal(str(level[1]))
-        elif isinstance(level, dict):
-            price = Decimal(str(level.get("price", 0)))
-            size = Decimal(str(level.get("size", 0)))
-        else:
+def _vwap_from_raw(raw_levels: list, target_quote: PX) -> Tuple[PX, PX]:
+    # Single pass over the raw book side: stop parsing as soon as target_quote is reached.
+    # A feed uses one level shape per response, so pick the accessor once from the first level.
+    if not raw_levels:
+        return 0.0, 0.0
+    first = raw_levels[0]
+    if isinstance(first, (list, tuple)):
+        pairs = ((level[0], level[1]) for level in raw_levels)
+    elif isinstance(first, dict):
+        pairs = ((level.get("price", 0), level.get("size", 0)) for level in raw_levels)
+    else:
+        return 0.0, 0.0
+    total_qty = 0.0
+    total_quote = 0.0
+    for raw_price, raw_size in pairs:
+        price = float(raw_price)
+        size = float(raw_size)
+        if price <= 0 or size <= 0:
             continue
-        if price > 0 and size > 0:
-            parsed.append((price, size))
-    return parsed
-
-
-def _vwap_by_quote(levels, target_quote: Decimal):
-    total_qty = Decimal("0")
-    total_quote = Decimal("0")
-    total_px_qty = Decimal("0")
-    for price, size in levels:
-        quote = price * size
         total_qty += size
-        total_px_qty += quote
-        total_quote += quote
+        total_quote += price * size
         if total_quote >= target_quote:
             break
     if total_qty <= 0:
-        return Decimal("0"), Decimal("0")
-    return total_px_qty / total_qty, total_quote
+        return 0.0, 0.0
+    return total_quote / total_qty, total_quote
 
 
-async def _fetch_lighter_vwap(symbol: str, base_url: str, target_quote: Decimal, timeout: int) -> Optional[Dict]:
-    markets = _fetch_lighter_markets(base_url, timeout=timeout)
-    if symbol not in markets:
-        return None
-    market_id = markets[symbol]["market_id"]
+_SNAPSHOT_MARK = '"subscribed/order_book"'
+_SNAPSHOT_MARK_B = _SNAPSHOT_MARK.encode()
+
+
+async def _fetch_lighter_vwap(market_id: int, base_url: str, target_quote: PX, timeout: int) -> Optional[Dict]:
     ws_url = _derive_ws_url(base_url)
-    async with websockets.connect(ws_url) as ws:
+    # No permessage-deflate: the snapshot is parsed once, so skipping inflate saves CPU per frame.
+    async with websockets.connect(ws_url, compression=None) as ws:
+        # Sent as text: Lighter expects JSON text frames, not binary.
         await ws.send(
-            json.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"})
+            orjson.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"}).decode()
         )
         start = time.time()
         while time.time() - start < timeout:
             msg = await ws.recv()
-            data = json.loads(msg)
+            # Cheap substring scan first: pongs and other pre-snapshot frames are never decoded.
+            if (_SNAPSHOT_MARK_B if isinstance(msg, bytes) else _SNAPSHOT_MARK) not in msg:
+                continue
+            data = orjson.loads(msg)
             if data.get("type") != "subscribed/order_book":
                 continue
             book = data.get("order_book", {})
-            bids = _parse_levels(book.get("bids", []))
-            asks = _parse_levels(book.get("asks", []))
-            vwap_bid, bid_quote = _vwap_by_quote(bids, target_quote)
-            vwap_ask, ask_quote = _vwap_by_quote(asks, target_quote)
+            vwap_bid, bid_quote = _vwap_from_raw(book.get("bids", []), target_quote)
+            vwap_ask, ask_quote = _vwap_from_raw(book.get("asks", []), target_quote)
             return {
                 "vwap_bid": vwap_bid,
                 "vwap_ask": vwap_ask,
@@ -138,17 +171,51 @@ async def _fetch_lighter_vwap(symbol: str, base_url: str, target_quote: Decimal,
     return None
 
 
+OSTIUM_NETWORK = "mainnet"
+# Same file and TTL variable as the hedge bot (hedge/hedge_mode_ostium.py), so either tool can warm it.
+_PAIRS_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "ostium_pairs.json")
+
+
+def _load_pair_ids() -> Optional[Dict[str, int]]:
+    # Pair ids are effectively immutable, so a warm start can skip the get_pairs subgraph query.
+    ttl = float(os.getenv("OSTIUM_PAIRS_CACHE_HOURS", "24")) * 3600
+    try:
+        if time.time() - os.path.getmtime(_PAIRS_CACHE_PATH) > ttl:
+            return None
+        with open(_PAIRS_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f).get(OSTIUM_NETWORK)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _save_pair_ids(pair_ids: Dict[str, int]) -> None:
+    try:
+        os.makedirs(os.path.dirname(_PAIRS_CACHE_PATH), exist_ok=True)
+        with open(_PAIRS_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump({OSTIUM_NETWORK: pair_ids}, f)
+    except OSError as exc:
+        print(f"写入 Ostium 交易对缓存失败: {exc}")
+
+
 def _parse_symbol(symbol: str) -> Tuple[str, str]:
     if symbol in FOREX_SYMBOLS and len(symbol) == 6:
         return symbol[:3], symbol[3:]
     return symbol, "USD"
 
 
-def _calc_limit_price(mid: Decimal, side: str, offset_bps: Decimal) -> Decimal:
-    offset = offset_bps / Decimal("10000")
+async def _fetch_funding_bps(sdk: OstiumSDK, pair_id: int) -> PX:
+    try:
+        _, _, funding_rate_percent, _ = await sdk.get_funding_rate_for_pair_id(pair_id, period_hours=24)
+        return float(funding_rate_percent) * 100
+    except Exception:
+        return 0.0
+
+
+def _calc_limit_price(mid: PX, side: str, offset_bps: PX) -> PX:
+    offset = offset_bps / 10000
     if side == "buy":
-        return mid * (Decimal("1") - offset)
-    return mid * (Decimal("1") + offset)
+        return mid * (1 - offset)
+    return mid * (1 + offset)
 
 
 def _stock_market_open_fallback() -> bool:
@@ -159,15 +226,15 @@ def _stock_market_open_fallback() -> bool:
     return 14 <= now.tm_hour < 21
 
 
-async def main() -> int:
+async def _run() -> int:
     parser = argparse.ArgumentParser(description="Ostium/Lighter 套利脚本（自动执行）")
     parser.add_argument("--symbol", required=True, help="如 BTC 或 EURUSD")
     parser.add_argument("--size", default="", help="基础资产数量（可空，自动按名义金额计算）")
-    parser.add_argument("--notional-usd", type=Decimal, default=Decimal("50"))
-    parser.add_argument("--min-net-bps", type=Decimal, default=Decimal("1"))
-    parser.add_argument("--depth-quote-usd", type=Decimal, default=Decimal("10000"))
-    parser.add_argument("--min-notional-usd", type=Decimal, default=Decimal("20"))
-    parser.add_argument("--max-notional-usd", type=Decimal, default=Decimal("200"))
+    parser.add_argument("--notional-usd", type=float, default=50.0)
+    parser.add_argument("--min-net-bps", type=float, default=1.0)
+    parser.add_argument("--depth-quote-usd", type=float, default=10000.0)
+    parser.add_argument("--min-notional-usd", type=float, default=20.0)
+    parser.add_argument("--max-notional-usd", type=float, default=200.0)
     parser.add_argument("--timeout", type=int, default=10)
     parser.add_argument("--execute", action="store_true", help="执行真实下单（默认仅计算）")
     parser.add_argument("--env-file", default=".env", help="env file path")
@@ -187,23 +254,55 @@ async def main() -> int:
     if not api_key_private_key:
         raise ValueError("API_KEY_PRIVATE_KEY required for Lighter")
 
-    sdk = OstiumSDK("mainnet", private_key=private_key, rpc_url=rpc_url)
-    lighter = None
+    sdk = OstiumSDK(OSTIUM_NETWORK, private_key=private_key, rpc_url=rpc_url)
+    # Signer setup (key load, signing context) is slow; build it in a thread while the market checks run.
+    lighter_task = None
+    if args.execute:
+        # run_in_executor rather than asyncio.to_thread, which needs Python 3.9.
+        lighter_task = asyncio.get_running_loop().run_in_executor(
+            None, SignerClient, lighter_base_url, api_key_private_key, api_key_index, account_index
+        )
 
     symbol = args.symbol.upper()
     base, quote = _parse_symbol(symbol)
 
-    pairs = await sdk.subgraph.get_pairs()
-    pair_id = None
-    for pair in pairs:
-        if pair.get("from") == base and pair.get("to") == quote:
-            pair_id = int(pair.get("id"))
-            break
+    pair_key = f"{base}-{quote}"
+    pair_ids = _load_pair_ids()
+    pair_id = pair_ids.get(pair_key) if pair_ids else None
+
+    # Oracle, Lighter REST and (on a cold cache) the subgraph are independent round-trips; overlap them.
+    legs = [
+        ("Ostium get_price", sdk.price.get_price(base, quote)),
+        ("Lighter orderBooks", _fetch_lighter_markets(lighter_base_url, timeout=args.timeout)),
+    ]
+    if pair_id is None:
+        legs.append(("Ostium get_pairs", sdk.subgraph.get_pairs()))
+    results = await asyncio.gather(*(coro for _, coro in legs), return_exceptions=True)
+    failed = False
+    for (name, _), res in zip(legs, results):
+        if isinstance(res, BaseException):
+            print(f"{name} 请求失败: {res!r}")
+            failed = True
+    if failed:
+        return 1
+    price_info, markets = results[0], results[1]
+
+    if pair_id is None:
+        pair_ids = {
+            f"{pair.get('from')}-{pair.get('to')}": int(pair.get("id"))
+            for pair in results[2]
+            if pair.get("from") and pair.get("to") and pair.get("id") is not None
+        }
+        _save_pair_ids(pair_ids)
+        pair_id = pair_ids.get(pair_key)
     if pair_id is None:
         print(f"未找到 Ostium 交易对: {base}-{quote}")
         return 1
 
-    price_mid, is_open, is_day_closed = await sdk.price.get_price(base, quote)
+    # Funding only feeds eval_side, so keep it in flight alongside the Lighter VWAP fetch.
+    funding_task = asyncio.create_task(_fetch_funding_bps(sdk, pair_id)) if symbol in CRYPTO_SYMBOLS else None
+
+    price_mid, is_open, is_day_closed = price_info
     if is_open is None:
         is_open = _stock_market_open_fallback()
     if is_day_closed is None:
@@ -212,25 +311,29 @@ async def main() -> int:
         print("股票交易时段关闭，跳过。")
         return 0
 
-    price_mid = Decimal(str(price_mid))
-    offset_bps = Decimal(os.getenv("OSTIUM_PRICE_OFFSET_BPS", "5"))
+    price_mid = float(price_mid)
+    offset_bps = float(os.getenv("OSTIUM_PRICE_OFFSET_BPS", "5"))
 
-    markets = _fetch_lighter_markets(lighter_base_url, timeout=args.timeout)
     if symbol not in markets:
         print("Lighter 无该标的。")
         return 0
     market_info = markets[symbol]
-    vwap = await _fetch_lighter_vwap(symbol, lighter_base_url, args.depth_quote_usd, args.timeout)
+    # Scales are fixed per market; derive them before the hedge path needs them.
+    base_mult = 10 ** int(market_info.get("supported_size_decimals", 5))
+    price_mult = 10 ** int(market_info.get("supported_price_decimals", 1))
+    vwap = await _fetch_lighter_vwap(
+        int(market_info["market_id"]), lighter_base_url, args.depth_quote_usd, args.timeout
+    )
     if not vwap or vwap["bid_quote"] < args.depth_quote_usd or vwap["ask_quote"] < args.depth_quote_usd:
         print("Lighter 深度不足 $10k，跳过。")
         return 0
 
-    vwap_bid = Decimal(str(vwap["vwap_bid"]))
-    vwap_ask = Decimal(str(vwap["vwap_ask"]))
+    vwap_bid = vwap["vwap_bid"]
+    vwap_ask = vwap["vwap_ask"]
 
     # auto size with notional bounds
     if args.size:
-        size = Decimal(args.size)
+        size = float(args.size)
     else:
         size = args.notional_usd / price_mid
 
@@ -245,32 +348,22 @@ async def main() -> int:
         notional = size * price_mid
 
     # funding (Ostium)
-    if symbol in CRYPTO_SYMBOLS:
-        try:
-            _, _, funding_rate_percent, _ = await sdk.get_funding_rate_for_pair_id(pair_id, period_hours=24)
-            funding_bps = Decimal(str(funding_rate_percent)) * Decimal("100")
-        except Exception:
-            funding_bps = Decimal("0")
+    funding_bps = await funding_task if funding_task is not None else 0.0
+
+    # evaluate both directions in one pass; fee/oracle cost is shared, only price and funding sign differ
+    cost_bps = _ostium_fee_bps_by_symbol(symbol, is_maker=True) + (0.10 / notional) * 10000
+    bps_scale = 10000 / price_mid
+    buy_price = _calc_limit_price(price_mid, "buy", offset_bps)
+    sell_price = _calc_limit_price(price_mid, "sell", offset_bps)
+    buy_gross = (vwap_bid - buy_price) * bps_scale
+    sell_gross = (sell_price - vwap_ask) * bps_scale
+    buy_net = buy_gross - cost_bps - funding_bps
+    sell_net = sell_gross - cost_bps + funding_bps
+    if buy_net >= sell_net:
+        best = ExecResult(symbol, "buy", buy_price, vwap_bid, buy_gross, cost_bps, funding_bps, buy_net)
     else:
-        funding_bps = Decimal("0")
-
-    # evaluate both directions
-    def eval_side(side: str) -> ExecResult:
-        ostium_price = _calc_limit_price(price_mid, side, offset_bps)
-        lighter_price = vwap_bid if side == "buy" else vwap_ask
-        gross_bps = (lighter_price - ostium_price) / price_mid * Decimal("10000") if side == "buy" else (
-            ostium_price - lighter_price
-        ) / price_mid * Decimal("10000")
-        fee_bps = _ostium_fee_bps_by_symbol(symbol, is_maker=True)
-        oracle_bps = (Decimal("0.10") / notional) * Decimal("10000")
-        cost_bps = fee_bps + oracle_bps
-        funding_cost = funding_bps if side == "buy" else -funding_bps
-        net_bps = gross_bps - cost_bps - funding_cost
-        return ExecResult(symbol, side, ostium_price, lighter_price, gross_bps, cost_bps, funding_cost, net_bps)
-
-    long_side = eval_side("buy")
-    short_side = eval_side("sell")
-    best = long_side if long_side.net_bps >= short_side.net_bps else short_side
+        # 0.0 - x rather than -x: a zero rate must not print as "-0.0000".
+        best = ExecResult(symbol, "sell", sell_price, vwap_ask, sell_gross, cost_bps, 0.0 - funding_bps, sell_net)
 
     open_side = "Ostium多 / Lighter空" if best.direction == "buy" else "Ostium空 / Lighter多"
     print(
@@ -287,25 +380,21 @@ async def main() -> int:
         print("未开启执行模式（--execute），仅计算。")
         return 0
 
-    lighter = SignerClient(
-        lighter_base_url,
-        api_key_private_key,
-        api_key_index,
-        account_index,
-    )
+    # Resolve before opening the Ostium leg so a signer failure cannot leave it unhedged.
+    lighter = await lighter_task
 
     # Place Ostium LIMIT order
-    leverage = Decimal(os.getenv("OSTIUM_LEVERAGE", "5"))
+    leverage = float(os.getenv("OSTIUM_LEVERAGE", "5"))
     trade_params = {
-        "collateral": float(notional / leverage),
-        "leverage": float(leverage),
+        "collateral": notional / leverage,
+        "leverage": leverage,
         "direction": best.direction == "buy",
         "asset_type": int(pair_id),
         "order_type": "LIMIT",
         "tp": 0,
         "sl": 0,
     }
-    result = sdk.ostium.perform_trade(trade_params, float(best.ostium_price))
+    result = sdk.ostium.perform_trade(trade_params, best.ostium_price)
     order_id = result.get("order_id")
     if not order_id:
         print("Ostium 下单失败")
@@ -330,16 +419,14 @@ async def main() -> int:
         return 1
 
     # Lighter hedge
-    client_order_index = int(time.time() * 1000)
+    client_order_index = time.time_ns() // 1_000_000
     is_ask = best.direction == "buy"
     price = vwap_bid if is_ask else vwap_ask
-    base_mult = 10 ** int(market_info.get("supported_size_decimals", 5))
-    price_mult = 10 ** int(market_info.get("supported_price_decimals", 1))
     tx, tx_hash, error = await lighter.create_order(
         market_index=vwap["market_id"],
         client_order_index=client_order_index,
-        base_amount=int(size * base_mult),
-        price=int(price * price_mult),
+        base_amount=int(round(size * base_mult)),
+        price=int(round(price * price_mult)),
         is_ask=is_ask,
         order_type=lighter.ORDER_TYPE_LIMIT,
         time_in_force=lighter.ORDER_TIME_IN_FORCE_GOOD_TILL_TIME,
@@ -354,11 +441,14 @@ async def main() -> int:
     return 0
 
 
+async def main() -> int:
+    try:
+        return await _run()
+    finally:
+        await _close_session()
+
+
 if __name__ == "__main__":
-    logging.getLogger("web3").setLevel(logging.WARNING)
-    logging.getLogger("urllib3").setLevel(logging.WARNING)
-    logging.getLogger("gql").setLevel(logging.WARNING)
-    logging.getLogger("websockets").setLevel(logging.WARNING)
-    logging.getLogger("websockets.client").setLevel(logging.WARNING)
-    logging.getLogger("asyncio").setLevel(logging.WARNING)
+    # web3/urllib3/gql/websockets/asyncio loggers are unset, so they inherit WARNING from the root.
+    logging.basicConfig(level=logging.WARNING, force=True)
     raise SystemExit(asyncio.run(main()))
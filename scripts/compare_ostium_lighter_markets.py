@@ -1,13 +1,20 @@
 import argparse
 import asyncio
-import json
+import functools
 import os
+import ssl
 import sys
-from typing import Iterable, Optional, Set
+from typing import Iterable, Optional, Set, Tuple, Union
 
-import requests
+import aiohttp
+import certifi
+import orjson
 
 
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+
+@functools.lru_cache(maxsize=4096)
 def _normalize_symbol(value: str) -> str:
     return value.strip().upper().replace("/", "-").replace("_", "-")
 
@@ -16,11 +23,13 @@ def _normalize_pair(from_asset: str, to_asset: str) -> str:
     return _normalize_symbol(f"{from_asset}-{to_asset}")
 
 
-def _fetch_lighter_symbols(base_url: str, timeout: int) -> Set[str]:
+async def _fetch_lighter_symbols(
+    session: aiohttp.ClientSession, base_url: str, timeout: int
+) -> Set[str]:
     url = f"{base_url.rstrip('/')}/api/v1/orderBooks"
-    resp = requests.get(url, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
+    async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        resp.raise_for_status()
+        data = await resp.json(loads=orjson.loads)
 
     order_books = data.get("order_books") or data.get("orderBooks") or []
     symbols = set()
@@ -63,7 +72,9 @@ async def _fetch_ostium_symbols(
         try:
             preview = pairs if isinstance(pairs, list) else {"raw": pairs}
             print("[debug] Ostium get_pairs() preview:")
-            print(json.dumps(preview[:5] if isinstance(preview, list) else preview, indent=2))
+            preview = preview[:5] if isinstance(preview, list) else preview
+            # default=str keeps non-JSON values (e.g. Decimal) printable instead of aborting the preview.
+            print(orjson.dumps(preview, default=str, option=orjson.OPT_INDENT_2).decode())
         except Exception as exc:
             print(f"[debug] Failed to print Ostium preview: {exc}")
 
@@ -86,6 +97,7 @@ async def _fetch_ostium_symbols(
     return symbols
 
 
+@functools.lru_cache(maxsize=4096)
 def _lighter_pair_to_base_quote(symbol: str) -> Optional[str]:
     """Lighter 货币对多为 6 位无连字符（如 EURUSD、USDJPY），转为 BASE-QUOTE 与 Ostium 一致。"""
     s = symbol.strip().upper()
@@ -94,6 +106,20 @@ def _lighter_pair_to_base_quote(symbol: str) -> Optional[str]:
     return None
 
 
+async def _fetch_all_symbols(
+    args: argparse.Namespace,
+) -> Tuple[Union[Set[str], BaseException], Union[Set[str], BaseException]]:
+    # Lighter REST and the Ostium subgraph are independent; fetch them concurrently.
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(ssl=_SSL_CTX)) as session:
+        return await asyncio.gather(
+            _fetch_lighter_symbols(session, args.lighter_base_url, args.timeout),
+            _fetch_ostium_symbols(
+                args.network, args.rpc_url, args.private_key, args.debug_ostium
+            ),
+            return_exceptions=True,
+        )
+
+
 def _format_list(values: Iterable[str]) -> str:
     return "\n".join(sorted(values))
 
@@ -140,20 +166,12 @@ def main() -> int:
         print("RPC_URL is required for Ostium SDK (set env or pass --rpc-url).")
         return 2
 
-    try:
-        lighter_symbols = _fetch_lighter_symbols(args.lighter_base_url, args.timeout)
-    except Exception as exc:
-        print(f"Failed to fetch Lighter symbols: {exc}")
+    lighter_symbols, ostium_symbols = asyncio.run(_fetch_all_symbols(args))
+    if isinstance(lighter_symbols, BaseException):
+        print(f"Failed to fetch Lighter symbols: {lighter_symbols}")
         return 1
-
-    try:
-        ostium_symbols = asyncio.run(
-            _fetch_ostium_symbols(
-                args.network, args.rpc_url, args.private_key, args.debug_ostium
-            )
-        )
-    except Exception as exc:
-        print(f"Failed to fetch Ostium symbols: {exc}")
+    if isinstance(ostium_symbols, BaseException):
+        print(f"Failed to fetch Ostium symbols: {ostium_symbols}")
         return 1
 
     common_exact = lighter_symbols.intersection(ostium_symbols)
@@ -161,20 +179,13 @@ def main() -> int:
     only_ostium = ostium_symbols.difference(lighter_symbols)
 
     # Ostium 多为 XXX-USD / XXX-EUR 等，取 base 与 Lighter 的单一符号做“相同标的”对比
-    ostium_bases: Set[str] = set()
-    for s in ostium_symbols:
-        if "-" in s:
-            ostium_bases.add(s.split("-")[0])
-        else:
-            ostium_bases.add(s)
+    ostium_bases: Set[str] = {s.partition("-")[0] for s in ostium_symbols}
     common_by_base = lighter_symbols.intersection(ostium_bases)
 
     # Lighter 货币对为 6 位无连字符（EURUSD、USDJPY），转成 XXX-YYY 与 Ostium 的 EUR-USD、USD-JPY 对比
-    lighter_as_pair: Set[str] = set()
-    for s in lighter_symbols:
-        pair_form = _lighter_pair_to_base_quote(s)
-        if pair_form:
-            lighter_as_pair.add(pair_form)
+    lighter_as_pair: Set[str] = {
+        p for s in lighter_symbols if (p := _lighter_pair_to_base_quote(s))
+    }
     common_forex = ostium_symbols.intersection(lighter_as_pair)
 
     # 相同标的 = 按 base 的单一资产 + 货币对（Ostium 形式列出）
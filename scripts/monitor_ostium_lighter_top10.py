@@ -1,13 +1,16 @@
 import argparse
 import asyncio
-import json
+import heapq
+import operator
 import os
+import ssl
 import sys
 import time
-from dataclasses import dataclass
+from bisect import bisect_left
 from decimal import Decimal
+from itertools import accumulate
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, NamedTuple, Optional, Tuple
 
 # 以 python scripts/xxx.py 运行时，把项目根加入 path，才能 import helpers
 _script_dir = Path(__file__).resolve().parent
@@ -16,14 +19,27 @@ if _script_dir.name == "scripts":
     if str(_project_root) not in sys.path:
         sys.path.insert(0, str(_project_root))
 
-import requests
+import aiohttp
+import certifi
+import orjson
 import websockets
 
 from ostium_python_sdk import OstiumSDK
-from helpers.telegram_bot import TelegramBot
-
-
-ORACLE_FEE_USD = Decimal("0.10")
+from helpers.telegram_bot import BASE_URL as TELEGRAM_BASE_URL
+
+
+# Internal math is float64; Decimal is kept only for CLI arguments, which are echoed in the report.
+ORACLE_FEE_USD = 0.10
+# Leverage cap for the crypto maker-fee tier.
+MAX_MAKER_LEVERAGE = 20.0
+# Largest frame accepted from the Lighter stream (one market's order-book snapshot).
+WS_MAX_FRAME_BYTES = 2**20
+FUNDING_CONCURRENCY = 8
+FUNDING_CALL_TIMEOUT = 3
+TELEGRAM_SEND_RETRIES = 3
+TELEGRAM_SEND_TIMEOUT = 10
+# Telegram rejects messages longer than this, so queued alerts are only merged up to it.
+TELEGRAM_MAX_TEXT = 4096
 KNOWN_LIGHTER_SYMBOLS = {
     "AAPL",
     "ADA",
@@ -77,26 +93,33 @@ STOCK_SYMBOLS = {
     "TSLA",
 }
 
+SORTED_LIGHTER_SYMBOLS: Tuple[str, ...] = tuple(sorted(KNOWN_LIGHTER_SYMBOLS))
+
+# Ostium price-feed key per Lighter symbol: forex splits into base-quote, everything else quotes in USD.
+SYMBOL_TO_PRICE_KEY: Dict[str, str] = {
+    sym: f"{sym[:3]}-{sym[3:]}" if sym in FOREX_SYMBOLS else f"{sym}-USD" for sym in KNOWN_LIGHTER_SYMBOLS
+}
 
-@dataclass
-class Candidate:
+
+# NamedTuple: no per-instance __dict__, and unlike dataclass(slots=True) it works before Python 3.10.
+class Candidate(NamedTuple):
     symbol: str
     direction: str
-    net_bps: Decimal
-    gross_bps: Decimal
-    cost_bps: Decimal
-    ostium_fee_bps: Decimal
-    oracle_fee_bps: Decimal
-    funding_bps: Decimal
-    funding_pnl_bps: Decimal
-    spread_bps: Decimal
-    depth_bid: Decimal
-    depth_ask: Decimal
-    depth_quote_bid: Decimal
-    depth_quote_ask: Decimal
-    min_net_bps: Decimal
-    ostium_price: Decimal
-    lighter_price: Decimal
+    net_bps: float
+    gross_bps: float
+    cost_bps: float
+    ostium_fee_bps: float
+    oracle_fee_bps: float
+    funding_bps: float
+    funding_pnl_bps: float
+    spread_bps: float
+    depth_bid: float
+    depth_ask: float
+    depth_quote_bid: float
+    depth_quote_ask: float
+    min_net_bps: float
+    ostium_price: float
+    lighter_price: float
 
 
 def _normalize_symbol(value: str) -> str:
@@ -113,11 +136,33 @@ def _parse_lighter_symbol(symbol: str) -> Tuple[str, str]:
     return symbol, "USD"
 
 
-def _fetch_lighter_order_books(base_url: str, timeout: int) -> Dict[str, Dict]:
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+
+# Process-lifetime keep-alive session, so each cycle reuses the TCP/TLS connection to Lighter.
+_SESSION: Optional[aiohttp.ClientSession] = None
+
+
+def _get_session() -> aiohttp.ClientSession:
+    global _SESSION
+    if _SESSION is None or _SESSION.closed:
+        _SESSION = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=8, keepalive_timeout=60, ssl=_SSL_CTX)
+        )
+    return _SESSION
+
+
+async def _close_session() -> None:
+    global _SESSION
+    if _SESSION is not None and not _SESSION.closed:
+        await _SESSION.close()
+    _SESSION = None
+
+
+async def _fetch_lighter_order_books(base_url: str, timeout: int) -> Dict[str, Dict]:
     url = f"{base_url.rstrip('/')}/api/v1/orderBooks"
-    resp = requests.get(url, timeout=timeout)
-    resp.raise_for_status()
-    data = resp.json()
+    async with _get_session().get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as resp:
+        resp.raise_for_status()
+        data = orjson.loads(await resp.read())
     order_books = data.get("order_books") or data.get("orderBooks") or []
     return {ob.get("symbol"): ob for ob in order_books if ob.get("symbol")}
 
@@ -130,173 +175,301 @@ def _derive_ws_url(base_url: str) -> str:
     return base_url.rstrip("/") + "/stream"
 
 
-async def _fetch_lighter_bbo_ws(
-    symbols: List[str],
-    base_url: str,
-    timeout: int,
-    ws_url: Optional[str] = None,
-    debug: bool = False,
-    target_quote: Decimal = Decimal("10000"),
-) -> Dict[str, Dict[str, Decimal]]:
-    markets = _fetch_lighter_order_books(base_url, timeout=timeout)
-    symbol_to_market = {
-        sym: markets[sym]["market_id"]
-        for sym in symbols
-        if sym in markets and "market_id" in markets[sym]
-    }
-    market_to_symbol = {int(v): k for k, v in symbol_to_market.items()}
-    pending = set(market_to_symbol.keys())
-    bbo_map: Dict[str, Dict[str, Decimal]] = {}
-
-    if not pending:
-        return bbo_map
+_PING_MARK = '"ping"'
+_PING_MARK_B = _PING_MARK.encode()
+# Matches the "subscribed/order_book" and "update/order_book" type tags, but not the channel name.
+_BOOK_MARK = '/order_book"'
+_BOOK_MARK_B = _BOOK_MARK.encode()
+_PONG_FRAME = orjson.dumps({"type": "pong"}).decode()
 
-    ws_url = ws_url or _derive_ws_url(base_url)
 
-    async with websockets.connect(ws_url) as ws:
-        for market_id in pending:
-            await ws.send(
-                json.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"})
-            )
+def _market_id_from_channel(channel: str) -> Optional[int]:
+    if ":" not in channel:
+        return None
+    try:
+        return int(channel.split(":")[-1])
+    except ValueError:
+        return None
 
-        start = time.time()
-        while pending and (time.time() - start) < timeout:
-            try:
-                msg = await asyncio.wait_for(ws.recv(), timeout=1)
-            except asyncio.TimeoutError:
-                continue
 
+def _apply_levels(book: Dict[float, float], levels) -> None:
+    for level in levels or []:
+        if isinstance(level, (list, tuple)) and len(level) >= 2:
+            price = float(level[0])
+            size = float(level[1])
+        elif isinstance(level, dict):
+            price = float(level.get("price", 0))
+            size = float(level.get("size", 0))
+        else:
+            continue
+        if price <= 0:
+            continue
+        if size > 0:
+            book[price] = size
+        else:
+            book.pop(price, None)
+
+
+class _LighterBookStream:
+    """One long-lived Lighter order-book subscription shared by every monitor cycle."""
+
+    def __init__(
+        self,
+        symbols: Tuple[str, ...],
+        base_url: str,
+        timeout: int,
+        ws_url: Optional[str] = None,
+        debug: bool = False,
+    ):
+        self.symbols = symbols
+        self.base_url = base_url
+        self.timeout = timeout
+        self.ws_url = ws_url or _derive_ws_url(base_url)
+        self.debug = debug
+        self.market_to_symbol: Dict[int, str] = {}
+        # market_id -> (bids, asks) as {price: size}; a market appears once its snapshot arrived.
+        self.books: Dict[int, Tuple[Dict[float, float], Dict[float, float]]] = {}
+        self.ready = asyncio.Event()
+
+    async def run(self) -> None:
+        backoff = 1.0
+        while True:
             try:
-                data = json.loads(msg)
-            except json.JSONDecodeError:
-                continue
+                markets = await _fetch_lighter_order_books(self.base_url, timeout=self.timeout)
+                self.market_to_symbol = {
+                    int(markets[sym]["market_id"]): sym
+                    for sym in self.symbols
+                    if sym in markets and "market_id" in markets[sym]
+                }
+                if self.market_to_symbol:
+                    # No permessage-deflate: frames are small JSON, so inflating them is pure CPU overhead.
+                    async with websockets.connect(self.ws_url, compression=None, max_size=WS_MAX_FRAME_BYTES) as ws:
+                        # One channel per subscribe frame; hand them all to the transport as a single batch.
+                        await asyncio.gather(*(
+                            ws.send(orjson.dumps({"type": "subscribe", "channel": f"order_book/{market_id}"}).decode())
+                            for market_id in self.market_to_symbol
+                        ))
+                        backoff = 1.0
+                        async for msg in ws:
+                            await self._on_message(ws, msg)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                print(f"lighter ws error: {exc}")
+            finally:
+                # Never serve books from a dead connection.
+                self.books.clear()
+                self.ready.clear()
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    async def _on_message(self, ws, msg) -> None:
+        # Byte-level triage before any JSON work: pings are tiny and tagged up front, and
+        # only order-book frames are worth a full decode.
+        is_bytes = isinstance(msg, bytes)
+        if (_PING_MARK_B if is_bytes else _PING_MARK) in msg[:64]:
+            try:
+                if orjson.loads(msg).get("type") == "ping":
+                    await ws.send(_PONG_FRAME)
+                    return
+            except orjson.JSONDecodeError:
+                return
+        if (_BOOK_MARK_B if is_bytes else _BOOK_MARK) not in msg:
+            return
 
-            if data.get("type") == "ping":
-                await ws.send(json.dumps({"type": "pong"}))
-                continue
+        try:
+            data = orjson.loads(msg)
+        except orjson.JSONDecodeError:
+            return
 
-            if data.get("type") != "subscribed/order_book":
-                continue
+        msg_type = data.get("type")
+        if msg_type not in ("subscribed/order_book", "update/order_book"):
+            return
+        market_id = _market_id_from_channel(data.get("channel", ""))
+        if market_id not in self.market_to_symbol:
+            return
 
-            channel = data.get("channel", "")
-            market_id = None
-            if ":" in channel:
-                try:
-                    market_id = int(channel.split(":")[-1])
-                except ValueError:
-                    market_id = None
-
-            order_book = data.get("order_book", {})
-            bids_raw = order_book.get("bids", [])
-            asks_raw = order_book.get("asks", [])
-            best_bid = _extract_best(bids_raw)
-            best_ask = _extract_best(asks_raw)
-
-            if market_id is None or best_bid is None or best_ask is None:
+        order_book = data.get("order_book", {})
+        if msg_type == "subscribed/order_book":
+            book = ({}, {})
+            self.books[market_id] = book
+            if len(self.books) >= len(self.market_to_symbol):
+                self.ready.set()
+        else:
+            book = self.books.get(market_id)
+            if book is None:
+                return
+        _apply_levels(book[0], order_book.get("bids"))
+        _apply_levels(book[1], order_book.get("asks"))
+
+    async def wait_ready(self, timeout: float) -> None:
+        # Only the first cycle after (re)connecting actually waits; a partial set is used on timeout.
+        try:
+            await asyncio.wait_for(self.ready.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def bbo_map(self, target_quote: float) -> Dict[str, Dict[str, float]]:
+        bbo_map: Dict[str, Dict[str, float]] = {}
+        for market_id, (bids, asks) in list(self.books.items()):
+            if not bids or not asks:
                 continue
+            bid_prices = sorted(bids, reverse=True)
+            ask_prices = sorted(asks)
+            vwap_bid, bid_depth, bid_quote = _compute_vwap_by_quote(
+                (bid_prices, [bids[p] for p in bid_prices]), target_quote=target_quote
+            )
+            vwap_ask, ask_depth, ask_quote = _compute_vwap_by_quote(
+                (ask_prices, [asks[p] for p in ask_prices]), target_quote=target_quote
+            )
+            bbo_map[self.market_to_symbol[market_id]] = {
+                "best_bid": bid_prices[0],
+                "best_ask": ask_prices[0],
+                "vwap_bid": vwap_bid,
+                "vwap_ask": vwap_ask,
+                "bid_depth": bid_depth,
+                "ask_depth": ask_depth,
+                "bid_quote": bid_quote,
+                "ask_quote": ask_quote,
+            }
+
+        if self.debug:
+            missing = sorted(set(self.market_to_symbol) - set(self.books))
+            if missing:
+                print(f"debug: lighter ws missing markets={missing}")
+        return bbo_map
 
-            symbol = market_to_symbol.get(market_id)
-            if symbol:
-                bids = _parse_levels(bids_raw)
-                asks = _parse_levels(asks_raw)
-                vwap_bid, bid_depth, bid_quote = _compute_vwap_by_quote(
-                    bids, target_quote=target_quote
-                )
-                vwap_ask, ask_depth, ask_quote = _compute_vwap_by_quote(
-                    asks, target_quote=target_quote
-                )
-                bbo_map[symbol] = {
-                    "best_bid": best_bid,
-                    "best_ask": best_ask,
-                    "vwap_bid": vwap_bid,
-                    "vwap_ask": vwap_ask,
-                    "bid_depth": bid_depth,
-                    "ask_depth": ask_depth,
-                    "bid_quote": bid_quote,
-                    "ask_quote": ask_quote,
-                }
-                pending.discard(market_id)
 
-        if debug and pending:
-            print(f"debug: lighter ws missing markets={sorted(pending)}")
+# Module-level like _SESSION so main() can stop it on the way out.
+_BOOK_STREAM_TASK: Optional[asyncio.Task] = None
 
-    return bbo_map
 
+async def _stop_book_stream() -> None:
+    global _BOOK_STREAM_TASK
+    if _BOOK_STREAM_TASK is None:
+        return
+    _BOOK_STREAM_TASK.cancel()
+    try:
+        await _BOOK_STREAM_TASK
+    except (asyncio.CancelledError, Exception):
+        pass
+    _BOOK_STREAM_TASK = None
 
-def _extract_best(levels) -> Optional[Decimal]:
-    if not levels:
-        return None
-    first = levels[0]
-    if isinstance(first, (list, tuple)) and first:
-        return Decimal(str(first[0]))
-    if isinstance(first, dict) and "price" in first:
-        return Decimal(str(first["price"]))
-    return None
 
+# Alerts are queued by the scan loop and sent by a background task, so a slow
+# Telegram round-trip never delays the next cycle.
+_ALERT_QUEUE: Optional[asyncio.Queue] = None
+_ALERT_TASK: Optional[asyncio.Task] = None
 
-def _parse_levels(levels: list) -> List[Tuple[Decimal, Decimal]]:
-    parsed: List[Tuple[Decimal, Decimal]] = []
-    for level in levels or []:
-        if isinstance(level, (list, tuple)) and len(level) >= 2:
-            price = Decimal(str(level[0]))
-            size = Decimal(str(level[1]))
-        elif isinstance(level, dict):
-            price = Decimal(str(level.get("price", 0)))
-            size = Decimal(str(level.get("size", 0)))
-        else:
-            continue
-        if price > 0 and size > 0:
-            parsed.append((price, size))
-    return parsed
+
+async def _send_telegram(token: str, chat_id: str, text: str) -> None:
+    url = f"{TELEGRAM_BASE_URL}{token}/sendMessage"
+    payload = {"chat_id": chat_id, "text": text, "parse_mode": "HTML"}
+    for attempt in range(1, TELEGRAM_SEND_RETRIES + 1):
+        try:
+            async with _get_session().post(
+                url, json=payload, timeout=aiohttp.ClientTimeout(total=TELEGRAM_SEND_TIMEOUT)
+            ) as resp:
+                data = orjson.loads(await resp.read())
+            if data.get("ok", False):
+                return
+            print(f"Telegram send message failed: {data}")
+            # 4xx other than rate limiting won't succeed on retry.
+            if resp.status != 429 and resp.status < 500:
+                return
+        except Exception as exc:
+            print(f"Telegram 提醒失败: {exc}")
+        if attempt < TELEGRAM_SEND_RETRIES:
+            await asyncio.sleep(attempt)
+
+
+async def _alert_worker(queue: asyncio.Queue, token: str, chat_id: str) -> None:
+    while True:
+        text = await queue.get()
+        done = 1
+        # Merge whatever queued up while the previous send was in flight.
+        while not queue.empty():
+            nxt = queue.get_nowait()
+            if len(text) + len(nxt) + 2 > TELEGRAM_MAX_TEXT:
+                await _send_telegram(token, chat_id, text)
+                text = nxt
+            else:
+                text = f"{text}\n\n{nxt}"
+            done += 1
+        try:
+            await _send_telegram(token, chat_id, text)
+        finally:
+            for _ in range(done):
+                queue.task_done()
+
+
+async def _stop_alert_worker(drain_timeout: float = TELEGRAM_SEND_TIMEOUT) -> None:
+    global _ALERT_QUEUE, _ALERT_TASK
+    if _ALERT_TASK is None:
+        return
+    # Give alerts raised in the last cycle (e.g. with --once) a chance to go out.
+    if _ALERT_QUEUE is not None and not _ALERT_TASK.done():
+        try:
+            await asyncio.wait_for(_ALERT_QUEUE.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            pass
+    _ALERT_TASK.cancel()
+    try:
+        await _ALERT_TASK
+    except (asyncio.CancelledError, Exception):
+        pass
+    _ALERT_QUEUE = None
+    _ALERT_TASK = None
 
 
 def _compute_vwap_by_quote(
-    levels: List[Tuple[Decimal, Decimal]], target_quote: Decimal
-) -> Tuple[Decimal, Decimal, Decimal]:
-    if not levels:
-        return Decimal("0"), Decimal("0"), Decimal("0")
-    total_qty = Decimal("0")
-    total_px_qty = Decimal("0")
-    total_quote = Decimal("0")
-    for price, size in levels:
-        quote = price * size
-        total_qty += size
-        total_px_qty += quote
-        total_quote += quote
-        if total_quote >= target_quote:
-            break
-    if total_qty <= 0:
-        return Decimal("0"), Decimal("0"), Decimal("0")
-    return total_px_qty / total_qty, total_qty, total_quote
-
-
-def _oracle_fee_bps(notional_usd: Decimal) -> Decimal:
+    levels: Tuple[List[float], List[float]], target_quote: float
+) -> Tuple[float, float, float]:
+    # float64 cumulative quote + binary search for the level that reaches target_quote.
+    prices, sizes = levels
+    if not prices:
+        return 0.0, 0.0, 0.0
+    cum_quote = list(accumulate(p * s for p, s in zip(prices, sizes)))
+    idx = min(bisect_left(cum_quote, target_quote) + 1, len(cum_quote))
+    total_qty = sum(sizes[:idx])
+    total_quote = cum_quote[idx - 1]
+    return total_quote / total_qty, total_qty, total_quote
+
+
+def _oracle_fee_bps(notional_usd: float) -> float:
     if notional_usd <= 0:
-        return Decimal("0")
-    return (ORACLE_FEE_USD / notional_usd) * Decimal("10000")
+        return 0.0
+    return (ORACLE_FEE_USD / notional_usd) * 10000
+
+
+# symbol -> (maker_bps, taker_bps); anything unlisted pays _DEFAULT_FEE_BPS.
+_DEFAULT_FEE_BPS: Tuple[float, float] = (5.0, 5.0)
+_FEE_TABLE: Dict[str, Tuple[float, float]] = {
+    **{s: (3.0, 10.0) for s in CRYPTO_SYMBOLS},
+    "XAU": (3.0, 3.0),
+    "XAG": (15.0, 15.0),
+    **{s: _DEFAULT_FEE_BPS for s in INDEX_SYMBOLS},
+    **{s: (3.0, 3.0) for s in FOREX_SYMBOLS},
+}
 
 
-def _ostium_fee_bps_by_symbol(symbol: str, is_maker: bool) -> Decimal:
-    if symbol in CRYPTO_SYMBOLS:
-        return Decimal("3") if is_maker else Decimal("10")
-    if symbol in METAL_SYMBOLS:
-        return Decimal("3") if symbol == "XAU" else Decimal("15")
-    if symbol in INDEX_SYMBOLS:
-        return Decimal("5")
-    if symbol in FOREX_SYMBOLS:
-        return Decimal("3")
-    return Decimal("5")
+def _ostium_fee_bps_by_symbol(symbol: str, is_maker: bool) -> float:
+    return _FEE_TABLE.get(symbol, _DEFAULT_FEE_BPS)[0 if is_maker else 1]
 
 
 async def _fetch_ostium_funding_map(
     sdk: OstiumSDK,
     pair_ids: Dict[str, int],
     period_hours: int,
-    cache: Dict[str, Tuple[float, Decimal]],
+    cache: Dict[str, Tuple[float, float]],
     cache_seconds: int,
-) -> Dict[str, Decimal]:
+) -> Dict[str, float]:
     now = time.time()
-    result: Dict[str, Decimal] = {}
+    result: Dict[str, float] = {}
+    # Cap in-flight RPCs so a burst cannot exhaust the SDK's pool, and bound each call so
+    # one slow pair cannot stall the cycle.
+    sem = asyncio.Semaphore(FUNDING_CONCURRENCY)
 
     async def fetch(symbol: str, pair_id: int) -> None:
         cached = cache.get(symbol)
@@ -305,15 +478,17 @@ async def _fetch_ostium_funding_map(
             return
 
         try:
-            _, _, funding_rate_percent, _ = await sdk.get_funding_rate_for_pair_id(
-                pair_id, period_hours=period_hours
-            )
-            funding_bps = Decimal(str(funding_rate_percent)) * Decimal("100")
+            async with sem:
+                _, _, funding_rate_percent, _ = await asyncio.wait_for(
+                    sdk.get_funding_rate_for_pair_id(pair_id, period_hours=period_hours),
+                    timeout=FUNDING_CALL_TIMEOUT,
+                )
+            funding_bps = float(funding_rate_percent) * 100
             cache[symbol] = (now, funding_bps)
             result[symbol] = funding_bps
         except Exception:
-            # If funding fetch fails, treat as 0 for this cycle
-            result[symbol] = Decimal("0")
+            # If funding fetch fails, reuse the last known (expired) value, else treat as 0 for this cycle
+            result[symbol] = cached[1] if cached else 0.0
 
     tasks = [fetch(sym, pair_id) for sym, pair_id in pair_ids.items()]
     if tasks:
@@ -321,8 +496,18 @@ async def _fetch_ostium_funding_map(
     return result
 
 
-async def _fetch_ostium_pairs(sdk: OstiumSDK) -> List[Dict]:
-    return await sdk.subgraph.get_pairs()
+async def _fetch_ostium_pairs(
+    sdk: OstiumSDK,
+    cache: Dict[str, Tuple[float, List[Dict]]],
+    cache_seconds: int,
+) -> List[Dict]:
+    # The pair list changes on the order of days, so most cycles skip the subgraph query.
+    cached = cache.get("pairs")
+    if cached and time.time() - cached[0] < cache_seconds:
+        return cached[1]
+    pairs = await sdk.subgraph.get_pairs()
+    cache["pairs"] = (time.time(), pairs)
+    return pairs
 
 
 async def _fetch_ostium_prices(sdk: OstiumSDK) -> List[Dict]:
@@ -337,28 +522,25 @@ def _build_price_map(prices: List[Dict]) -> Dict[str, Dict]:
     return price_map
 
 
-def _calc_limit_price(
-    direction: str, bid: Decimal, ask: Decimal, mid: Decimal, offset_bps: Decimal
-) -> Decimal:
-    offset = offset_bps / Decimal("10000")
+def _calc_limit_price(direction: str, bid: float, ask: float, mid: float, offset_bps: float) -> float:
+    offset = offset_bps / 10000
     if direction == "buy":
         base = bid if bid > 0 else mid
-        return base * (Decimal("1") - offset)
+        return base * (1 - offset)
     base = ask if ask > 0 else mid
-    return base * (Decimal("1") + offset)
+    return base * (1 + offset)
 
 
-def _calc_spread_bps(
-    direction: str,
-    ostium_price: Decimal,
-    lighter_price: Decimal,
-    mid: Decimal,
-) -> Decimal:
+def _calc_spread_bps(direction: str, ostium_price: float, lighter_price: float, mid: float) -> float:
     if mid <= 0:
-        return Decimal("0")
+        return 0.0
     if direction == "buy":
-        return (lighter_price - ostium_price) / mid * Decimal("10000")
-    return (ostium_price - lighter_price) / mid * Decimal("10000")
+        return (lighter_price - ostium_price) / mid * 10000
+    return (ostium_price - lighter_price) / mid * 10000
+
+
+# Rankings only ever need the top few rows, so select with heapq.nlargest instead of full sorts.
+_NET_BPS = operator.attrgetter("net_bps")
 
 
 def _format_candidate_row(rank: int, c: Candidate, open_side: str) -> str:
@@ -384,12 +566,12 @@ def _format_process_row(c: Candidate, notional_usd: Decimal) -> str:
     )
 
 
-def _print_header(max_items: int, min_net_bps: Decimal) -> None:
-    print(f"Top{max_items} 候选（最小净利 {min_net_bps} bps）")
-    print(
+def _append_header(out: List[str], max_items: int, min_net_bps: Decimal) -> None:
+    out.append(f"Top{max_items} 候选（最小净利 {min_net_bps} bps）")
+    out.append(
         "序  标的     开多/开空平台      利润bps      成本bps      净利润bps(含资金)  Ostium价      Lighter价"
     )
-    print("-" * 110)
+    out.append("-" * 110)
 
 
 def _format_alert_line(c: Candidate) -> str:
@@ -401,58 +583,60 @@ def _format_alert_line(c: Candidate) -> str:
     )
 
 
+# Later entries win, matching the old if-chain order (forex > commodity > stocks > crypto).
+_CATEGORY: Dict[str, str] = {
+    **{s: "crypto" for s in CRYPTO_SYMBOLS},
+    **{s: "stocks" for s in STOCK_SYMBOLS},
+    **{s: "commodity" for s in METAL_SYMBOLS},
+    **{s: "forex" for s in FOREX_SYMBOLS},
+}
+
+
 def _category_for_symbol(symbol: str) -> str:
-    if symbol in FOREX_SYMBOLS:
-        return "forex"
-    if symbol in METAL_SYMBOLS:
-        return "commodity"
-    if symbol in STOCK_SYMBOLS:
-        return "stocks"
-    if symbol in CRYPTO_SYMBOLS:
-        return "crypto"
-    return "other"
-
-
-def _print_rankings(
+    return _CATEGORY.get(symbol, "other")
+
+
+def _format_rankings(
+    out: List[str],
     candidates: List[Candidate],
     all_ranked: List[Candidate],
     max_items: int,
     min_net_bps: Decimal,
     notional_usd: Decimal,
 ) -> None:
-    print(f"说明：Lighter 侧使用 ${notional_usd} 深度的 VWAP 买/卖价计算利润")
-    print("\n[综合前10]")
-    _print_header(max_items, min_net_bps)
-    for idx, cand in enumerate(candidates[:max_items], start=1):
+    out.append(f"说明：Lighter 侧使用 ${notional_usd} 深度的 VWAP 买/卖价计算利润")
+    out.append("\n[综合前10]")
+    _append_header(out, max_items, min_net_bps)
+    for idx, cand in enumerate(heapq.nlargest(max_items, candidates, key=_NET_BPS), start=1):
         open_side = "Ostium多 / Lighter空" if cand.direction == "buy" else "Ostium空 / Lighter多"
-        print(_format_candidate_row(idx, cand, open_side))
-        print(_format_process_row(cand, notional_usd))
+        out.append(_format_candidate_row(idx, cand, open_side))
+        out.append(_format_process_row(cand, notional_usd))
 
     if not candidates:
-        print("无标的满足阈值，输出磨损最小的 5 个标的。")
-        fallback = all_ranked[:5]
+        out.append("无标的满足阈值，输出磨损最小的 5 个标的。")
+        fallback = heapq.nlargest(5, all_ranked, key=_NET_BPS)
         for idx, cand in enumerate(fallback, start=1):
             open_side = "Ostium多 / Lighter空" if cand.direction == "buy" else "Ostium空 / Lighter多"
-            print(_format_candidate_row(idx, cand, open_side))
-            print(_format_process_row(cand, notional_usd))
+            out.append(_format_candidate_row(idx, cand, open_side))
+            out.append(_format_process_row(cand, notional_usd))
 
-    def print_category(title: str, categories: Tuple[str, ...], limit: int) -> None:
+    def append_category(title: str, categories: Tuple[str, ...], limit: int) -> None:
         subset = [c for c in candidates if _category_for_symbol(c.symbol) in categories]
         if not subset:
             return
-        print(f"\n[{title}]")
-        _print_header(limit, min_net_bps)
-        for idx, cand in enumerate(subset[:limit], start=1):
+        out.append(f"\n[{title}]")
+        _append_header(out, limit, min_net_bps)
+        for idx, cand in enumerate(heapq.nlargest(limit, subset, key=_NET_BPS), start=1):
             open_side = "Ostium多 / Lighter空" if cand.direction == "buy" else "Ostium空 / Lighter多"
-            print(_format_candidate_row(idx, cand, open_side))
-            print(_format_process_row(cand, notional_usd))
+            out.append(_format_candidate_row(idx, cand, open_side))
+            out.append(_format_process_row(cand, notional_usd))
 
-    print_category("外汇前5", ("forex",), 5)
-    print_category("股票/大宗商品前5", ("stocks", "commodity"), 5)
-    print_category("加密前5", ("crypto",), 5)
+    append_category("外汇前5", ("forex",), 5)
+    append_category("股票/大宗商品前5", ("stocks", "commodity"), 5)
+    append_category("加密前5", ("crypto",), 5)
 
 
-async def main() -> int:
+async def _run() -> int:
     parser = argparse.ArgumentParser(
         description="Monitor top10 Ostium/Lighter opportunities every minute"
     )
@@ -466,6 +650,7 @@ async def main() -> int:
     parser.add_argument("--notional-usd", type=Decimal, default=Decimal("10000"))
     parser.add_argument("--funding-hours", type=int, default=24)
     parser.add_argument("--funding-cache-seconds", type=int, default=300)
+    parser.add_argument("--pairs-cache-seconds", type=int, default=600)
     parser.add_argument("--exclude-symbols", type=str, default="SPX")
     parser.add_argument("--depth-quote-usd", type=Decimal, default=Decimal("10000"))
     parser.add_argument("--min-depth-quote-usd", type=Decimal, default=Decimal("10000"))
@@ -488,65 +673,88 @@ async def main() -> int:
     sdk = OstiumSDK("mainnet", private_key=None, rpc_url=args.rpc_url)
     print("监控已启动")
     sys.stdout.flush()
-    funding_cache: Dict[str, Tuple[float, Decimal]] = {}
+    funding_cache: Dict[str, Tuple[float, float]] = {}
+    pairs_cache: Dict[str, Tuple[float, List[Dict]]] = {}
     alert_cache: Dict[str, float] = {}
+    pairs_signature: Optional[Tuple[int, object]] = None
+    funding_pair_ids: Dict[str, int] = {}
     tg_token = os.getenv("TELEGRAM_BOT_TOKEN", "")
     tg_chat_id = os.getenv("TELEGRAM_CHAT_ID", "")
 
+    # CLI thresholds stay Decimal for display; the scoring loop uses these float copies.
+    depth_quote = float(args.depth_quote_usd)
+    min_depth_quote = float(args.min_depth_quote_usd)
+    max_spread_bps = float(args.max_spread_bps)
+    max_dislocation_bps = float(args.max_dislocation_bps)
+    base_min_net_bps = float(args.min_net_bps)
+    spread_weight = float(args.spread_weight)
+    offset_bps = float(args.offset_bps)
+    alert_net_bps = float(args.alert_net_bps)
+    oracle_fee_bps = _oracle_fee_bps(float(args.notional_usd))
+    fixed_cost_bps = oracle_fee_bps + float(args.buffer_bps)
+    maker_leverage_ok = float(args.ostium_leverage) <= MAX_MAKER_LEVERAGE
+
+    global _BOOK_STREAM_TASK
+    book_stream = _LighterBookStream(
+        SORTED_LIGHTER_SYMBOLS,
+        args.lighter_base_url,
+        timeout=15,
+        ws_url=args.lighter_ws_url or None,
+        debug=args.debug,
+    )
+    _BOOK_STREAM_TASK = asyncio.create_task(book_stream.run())
+
+    global _ALERT_QUEUE, _ALERT_TASK
+    if args.alert_net_bps > 0 and tg_token and tg_chat_id:
+        _ALERT_QUEUE = asyncio.Queue()
+        _ALERT_TASK = asyncio.create_task(_alert_worker(_ALERT_QUEUE, tg_token, tg_chat_id))
+
     while True:
         try:
-            try:
-                pairs = await asyncio.wait_for(_fetch_ostium_pairs(sdk), timeout=30)
-            except Exception as exc:
-                print(f"fetch ostium pairs failed: {exc}")
-                await asyncio.sleep(args.interval)
-                continue
-
-            try:
-                prices = await asyncio.wait_for(_fetch_ostium_prices(sdk), timeout=30)
-            except Exception as exc:
-                print(f"fetch ostium prices failed: {exc}")
+            # The Ostium and Lighter fetches are independent until scoring, so run them concurrently.
+            # Only the first cycle really waits on the book stream; afterwards it is already live.
+            pairs, prices, lighter_books, _ = await asyncio.gather(
+                asyncio.wait_for(_fetch_ostium_pairs(sdk, pairs_cache, args.pairs_cache_seconds), timeout=30),
+                asyncio.wait_for(_fetch_ostium_prices(sdk), timeout=30),
+                _fetch_lighter_order_books(args.lighter_base_url, timeout=15),
+                book_stream.wait_ready(timeout=15),
+                return_exceptions=True,
+            )
+            fetch_failed = False
+            for label, res in (
+                ("fetch ostium pairs failed", pairs),
+                ("fetch ostium prices failed", prices),
+                ("fetch lighter books failed", lighter_books),
+            ):
+                if isinstance(res, BaseException):
+                    print(f"{label}: {res}")
+                    fetch_failed = True
+            if fetch_failed:
                 await asyncio.sleep(args.interval)
                 continue
 
+            bbo_map = book_stream.bbo_map(depth_quote)
             price_map = _build_price_map(prices)
 
-            try:
-                lighter_books = _fetch_lighter_order_books(args.lighter_base_url, timeout=15)
-            except Exception as exc:
-                print(f"fetch lighter books failed: {exc}")
-                await asyncio.sleep(args.interval)
-                continue
-
-            bbo_map = await _fetch_lighter_bbo_ws(
-                sorted(KNOWN_LIGHTER_SYMBOLS),
-                args.lighter_base_url,
-                timeout=15,
-                ws_url=args.lighter_ws_url or None,
-                debug=args.debug,
-                target_quote=args.depth_quote_usd,
-            )
-
             candidates: List[Candidate] = []
             all_ranked: List[Candidate] = []
-            oracle_fee_bps = _oracle_fee_bps(args.notional_usd)
             # funding_cache reused across cycles to avoid heavy calls
             matched_pairs = 0
+            ranked = 0
             excluded = {s.strip().upper() for s in args.exclude_symbols.split(",") if s.strip()}
 
-            pair_id_map: Dict[str, int] = {}
-            for pair in pairs:
-                base = pair.get("from")
-                quote = pair.get("to")
-                pair_id = pair.get("id")
-                if base and quote and pair_id is not None:
-                    pair_id_map[f"{base}-{quote}"] = int(pair_id)
-
-            funding_pair_ids: Dict[str, int] = {}
-            for sym in CRYPTO_SYMBOLS:
-                key = f"{sym}-USD"
-                if key in pair_id_map:
-                    funding_pair_ids[sym] = pair_id_map[key]
+            # Pair ids practically never change; rebuild the id maps only when the pair list does.
+            signature = (len(pairs), pairs[0].get("id") if pairs else None)
+            if signature != pairs_signature:
+                pair_id_map = {
+                    f"{pair.get('from')}-{pair.get('to')}": int(pair.get("id"))
+                    for pair in pairs
+                    if pair.get("from") and pair.get("to") and pair.get("id") is not None
+                }
+                funding_pair_ids = {
+                    sym: pair_id_map[f"{sym}-USD"] for sym in CRYPTO_SYMBOLS if f"{sym}-USD" in pair_id_map
+                }
+                pairs_signature = signature
 
             funding_map = await _fetch_ostium_funding_map(
                 sdk,
@@ -556,7 +764,7 @@ async def main() -> int:
                 cache_seconds=args.funding_cache_seconds,
             )
 
-            for symbol in sorted(KNOWN_LIGHTER_SYMBOLS):
+            for symbol in SORTED_LIGHTER_SYMBOLS:
                 if symbol in excluded:
                     continue
                 if symbol not in lighter_books:
@@ -564,59 +772,55 @@ async def main() -> int:
                 if symbol not in bbo_map:
                     continue
 
-                if symbol in FOREX_SYMBOLS:
-                    base, quote = symbol[:3], symbol[3:]
-                    price_key = f"{base}-{quote}"
-                elif symbol in METAL_SYMBOLS or symbol in INDEX_SYMBOLS or symbol in CRYPTO_SYMBOLS:
-                    price_key = f"{symbol}-USD"
-                else:
-                    price_key = f"{symbol}-USD"
-
-                price_info = price_map.get(price_key)
+                price_info = price_map.get(SYMBOL_TO_PRICE_KEY[symbol])
                 if not price_info:
                     continue
 
                 matched_pairs += 1
                 book = bbo_map[symbol]
-                best_bid = book.get("best_bid", Decimal("0"))
-                best_ask = book.get("best_ask", Decimal("0"))
-                vwap_bid = book.get("vwap_bid", Decimal("0"))
-                vwap_ask = book.get("vwap_ask", Decimal("0"))
-                bid_depth = book.get("bid_depth", Decimal("0"))
-                ask_depth = book.get("ask_depth", Decimal("0"))
-                bid_quote = book.get("bid_quote", Decimal("0"))
-                ask_quote = book.get("ask_quote", Decimal("0"))
-
-                if bid_quote < args.min_depth_quote_usd or ask_quote < args.min_depth_quote_usd:
+                vwap_bid = book.get("vwap_bid", 0.0)
+                vwap_ask = book.get("vwap_ask", 0.0)
+                bid_quote = book.get("bid_quote", 0.0)
+                ask_quote = book.get("ask_quote", 0.0)
+
+                if bid_quote < min_depth_quote or ask_quote < min_depth_quote:
                     continue
 
-                bid = Decimal(str(price_info.get("bid", price_info.get("mid", 0))))
-                ask = Decimal(str(price_info.get("ask", price_info.get("mid", 0))))
-                mid = Decimal(str(price_info.get("mid", 0)))
+                bid = float(price_info.get("bid", price_info.get("mid", 0)))
+                ask = float(price_info.get("ask", price_info.get("mid", 0)))
+                mid = float(price_info.get("mid", 0))
                 if mid <= 0:
                     continue
 
-                spread_bps = Decimal("0")
+                spread_bps = 0.0
                 if vwap_bid > 0 and vwap_ask > 0:
-                    spread_bps = (vwap_ask - vwap_bid) / vwap_bid * Decimal("10000")
+                    spread_bps = (vwap_ask - vwap_bid) / vwap_bid * 10000
 
-                if spread_bps > args.max_spread_bps:
+                if spread_bps > max_spread_bps:
                     continue
 
+                # Per-symbol terms shared by both directions.
+                fee_bps = _ostium_fee_bps_by_symbol(symbol, symbol in CRYPTO_SYMBOLS and maker_leverage_ok)
+                cost_bps = fee_bps + fixed_cost_bps
+                funding_rate_bps = funding_map.get(symbol, 0.0)
+                min_net_bps = base_min_net_bps + spread_bps * spread_weight
+
                 for direction in ("buy", "sell"):
-                    maker_ok = symbol in CRYPTO_SYMBOLS and args.ostium_leverage <= Decimal("20")
-                    fee_bps = _ostium_fee_bps_by_symbol(symbol, maker_ok)
-                    ostium_price = _calc_limit_price(direction, bid, ask, mid, args.offset_bps)
+                    ostium_price = _calc_limit_price(direction, bid, ask, mid, offset_bps)
                     lighter_price = vwap_bid if direction == "buy" else vwap_ask
                     gross_bps = _calc_spread_bps(direction, ostium_price, lighter_price, mid)
-                    cost_bps = fee_bps + oracle_fee_bps + args.buffer_bps
-                    funding_rate_bps = funding_map.get(symbol, Decimal("0"))
-                    funding_cost_bps = funding_rate_bps if direction == "buy" else -funding_rate_bps
-                    funding_pnl_bps = Decimal("0") - funding_cost_bps
-                    min_net_bps = args.min_net_bps + spread_bps * args.spread_weight
+                    if abs(gross_bps) > max_dislocation_bps:
+                        continue
+
+                    # 0.0 - x rather than -x: a zero rate must not print as "-0.0000".
+                    funding_cost_bps = funding_rate_bps if direction == "buy" else 0.0 - funding_rate_bps
                     net_bps = gross_bps - cost_bps - funding_cost_bps
+                    ranked += 1
 
-                    if abs(gross_bps) > args.max_dislocation_bps:
+                    # Below-threshold rows only feed the "no candidates" fallback, so once any
+                    # candidate exists they are dropped before building a Candidate at all.
+                    below_threshold = net_bps < min_net_bps
+                    if below_threshold and candidates:
                         continue
 
                     item = Candidate(
@@ -628,42 +832,40 @@ async def main() -> int:
                         ostium_fee_bps=fee_bps,
                         oracle_fee_bps=oracle_fee_bps,
                         funding_bps=funding_cost_bps,
-                        funding_pnl_bps=funding_pnl_bps,
+                        funding_pnl_bps=0.0 - funding_cost_bps,
                         spread_bps=spread_bps,
-                        depth_bid=bid_depth,
-                        depth_ask=ask_depth,
+                        depth_bid=book.get("bid_depth", 0.0),
+                        depth_ask=book.get("ask_depth", 0.0),
                         depth_quote_bid=bid_quote,
                         depth_quote_ask=ask_quote,
                         min_net_bps=min_net_bps,
                         ostium_price=ostium_price,
                         lighter_price=lighter_price,
                     )
-                    all_ranked.append(item)
+                    if below_threshold:
+                        all_ranked.append(item)
+                    else:
+                        candidates.append(item)
 
-                    if net_bps < min_net_bps:
-                        continue
-
-                    candidates.append(item)
-
-            candidates.sort(key=lambda c: c.net_bps, reverse=True)
-            all_ranked.sort(key=lambda c: c.net_bps, reverse=True)
             ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
-            print(f"\n[{ts}]")
-            _print_rankings(candidates, all_ranked, args.max_items, args.min_net_bps, args.notional_usd)
+            # Build the whole report first and write it once, instead of one print() per line.
+            out: List[str] = [f"\n[{ts}]"]
+            _format_rankings(out, candidates, all_ranked, args.max_items, args.min_net_bps, args.notional_usd)
             if args.debug:
-                print(
+                out.append(
                     f"debug: ostium_pairs={len(pairs)} prices={len(prices)} "
                     f"price_map={len(price_map)} lighter_books={len(lighter_books)} "
                     f"bbo_map={len(bbo_map)} matched_pairs={matched_pairs} "
-                    f"ranked={len(all_ranked)}"
+                    f"ranked={ranked}"
                 )
+            sys.stdout.write("\n".join(out) + "\n")
 
             # Telegram alert
-            if args.alert_net_bps > 0 and tg_token and tg_chat_id:
+            if _ALERT_QUEUE is not None:
                 now_ts = time.time()
                 alert_items: List[Candidate] = []
                 for cand in candidates:
-                    if cand.net_bps < args.alert_net_bps:
+                    if cand.net_bps < alert_net_bps:
                         continue
                     key = f"{cand.symbol}:{cand.direction}"
                     last_ts = alert_cache.get(key, 0)
@@ -673,18 +875,13 @@ async def main() -> int:
                     alert_items.append(cand)
 
                 if alert_items:
-                    alert_items.sort(key=lambda c: c.net_bps, reverse=True)
                     lines = [
                         "Ostium/Lighter 监控提醒",
                         f"阈值: {args.alert_net_bps} bps",
                     ]
-                    for item in alert_items[:5]:
+                    for item in heapq.nlargest(5, alert_items, key=_NET_BPS):
                         lines.append(_format_alert_line(item))
-                    message = "\n".join(lines)
-                    try:
-                        TelegramBot(tg_token, tg_chat_id).send_text(message, parse_mode="HTML")
-                    except Exception as exc:
-                        print(f"Telegram 提醒失败: {exc}")
+                    _ALERT_QUEUE.put_nowait("\n".join(lines))
 
             if args.debug:
                 sample_pairs = [f"{p.get('from')}-{p.get('to')}" for p in pairs[:5]]
@@ -706,5 +903,20 @@ async def main() -> int:
         await asyncio.sleep(args.interval)
 
 
+async def main() -> int:
+    try:
+        return await _run()
+    finally:
+        await _stop_alert_worker()
+        await _stop_book_stream()
+        await _close_session()
+
+
 if __name__ == "__main__":
+    # uvloop is optional; fall back to the default asyncio loop when it isn't installed.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
     raise SystemExit(asyncio.run(main()))
@@ -0,0 +1,133 @@
+import sys
+import os
+import tempfile
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+import asyncio
+from decimal import Decimal
+from unittest.mock import AsyncMock, Mock
+
+from hedge.hedge_mode_ostium import HedgeBot
+
+
+def _make_bot() -> HedgeBot:
+    bot = HedgeBot(ticker="BTC", order_quantity=Decimal("1"), iterations=1)
+    bot.setup_signal_handlers = Mock()
+    bot.initialize_ostium = AsyncMock()
+    bot.initialize_lighter = Mock()
+    bot._ensure_http = AsyncMock()
+    bot._close_http = AsyncMock()
+    bot._start_lighter_ws = AsyncMock()
+    bot.get_lighter_market_config = AsyncMock(return_value=(1, 100, 100))
+    bot.refresh_positions = AsyncMock()
+    bot.place_ostium_limit_order = AsyncMock(
+        return_value={"tradeNotional": "100", "openPrice": "100"}
+    )
+    return bot
+
+
+# 成交后下一次取价失败：已排队的 Lighter 对冲仍需在退出前执行
+async def _exception_after_fill(bot: HedgeBot) -> list:
+    hedges = []
+
+    async def slow_hedge(side, quantity):
+        await asyncio.sleep(0.05)
+        hedges.append((side, quantity))
+
+    bot.place_lighter_market_order = slow_hedge
+    price = (Decimal("100"), Decimal("101"), Decimal("100.5"))
+    bot.get_ostium_price = AsyncMock(side_effect=[price, ConnectionError("price feed down")])
+
+    try:
+        await bot.run()
+    except ConnectionError:
+        pass
+    else:
+        raise AssertionError("run() should re-raise the price feed error")
+    return hedges
+
+
+# 一轮买卖多次成交：worker 需连续处理多次对冲（Python 3.9 下队列不能绑定到错误的事件循环）
+async def _full_iteration(bot: HedgeBot) -> list:
+    hedges = []
+
+    async def hedge(side, quantity):
+        hedges.append((side, quantity))
+
+    async def ostium_fill(side, quantity, prices=None):
+        bot.ostium_position += quantity if side == "buy" else -quantity
+        return {"tradeNotional": "100", "openPrice": "100"}
+
+    bot.place_lighter_market_order = hedge
+    bot.place_ostium_limit_order = ostium_fill
+    bot.get_ostium_price = AsyncMock(return_value=(Decimal("100"), Decimal("101"), Decimal("100.5")))
+    await bot.run()
+    return hedges
+
+
+# 对冲排空后，卖出半周期的首单不能沿用排空前的快照价格
+async def _orders_after_drain(bot: HedgeBot) -> list:
+    orders = []
+    quotes = iter(range(100, 200))
+
+    async def slow_hedge(side, quantity):
+        await asyncio.sleep(0.05)
+
+    async def next_price():
+        bid = Decimal(next(quotes))
+        return bid, bid + 1, bid + Decimal("0.5")
+
+    async def ostium_fill(side, quantity, prices=None):
+        orders.append((side, prices))
+        bot.ostium_position += quantity if side == "buy" else -quantity
+        return {"tradeNotional": "100", "openPrice": "100"}
+
+    bot.place_lighter_market_order = slow_hedge
+    bot.place_ostium_limit_order = ostium_fill
+    bot.get_ostium_price = next_price
+    await bot.run()
+    return orders
+
+
+def _run_in_tmp(scenario):
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            # 与 __main__ 相同：先构造 bot，再由 asyncio.run 启动事件循环
+            bot = _make_bot()
+            hedges = asyncio.run(scenario(bot))
+        finally:
+            os.chdir(cwd)
+    return bot, hedges
+
+
+def test_hedge_executed_when_snapshot_fails_after_fill():
+    bot, hedges = _run_in_tmp(_exception_after_fill)
+    assert hedges == [("sell", Decimal("1"))], hedges
+    assert bot._pending_hedge_qty == 0
+    assert bot._hedge_task is None
+
+
+def test_hedge_worker_handles_consecutive_fills():
+    bot, hedges = _run_in_tmp(_full_iteration)
+    # 买到 +1 后卖到 -1：一次 Lighter 卖出对冲，两次买入对冲
+    assert hedges == [("sell", Decimal("1")), ("buy", Decimal("1")), ("buy", Decimal("1"))], hedges
+    assert bot._pending_hedge_qty == 0
+
+
+def test_sell_half_does_not_reuse_pre_drain_prices():
+    _, orders = _run_in_tmp(_orders_after_drain)
+    # None：place_ostium_limit_order 自行取价
+    assert [side for side, _ in orders] == ["buy", "sell", "sell"], orders
+    assert orders[0][1][0] == Decimal("100"), orders
+    assert orders[1][1] is None, orders
+    assert orders[2][1][0] == Decimal("102"), orders
+
+
+if __name__ == "__main__":
+    test_hedge_executed_when_snapshot_fails_after_fill()
+    test_hedge_worker_handles_consecutive_fills()
+    test_sell_half_does_not_reuse_pre_drain_prices()
+    print("ok")